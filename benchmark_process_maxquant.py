@@ -0,0 +1,297 @@
+"""
+Description: This code serves to benchmark the process_maxquant script on synthetic maxquant files of a configurable size.
+Uniprot and mitocarta are replaced by local stand-ins, so the timings don't depend on the internet and are reproducible.
+"""
+import os.path
+import sys
+import json
+import copy
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from process_maxquant import process_maxquant_file
+from process_maxquant import get_run_report_path
+from mock_uniprot_server import UniprotRecording
+from mock_uniprot_server import start_mock_uniprot_server
+from mock_uniprot_server import PROTEINS_PATH
+from mock_uniprot_server import MAPPING_PATH
+
+ORGANISM_NAMES = ("Homo sapiens", "Mus musculus")
+ORGANISM_MNEMONICS = ("HUMAN", "MOUSE")
+
+
+class QuietReporter:
+    """
+    Replaces the gui during the benchmark, only the errors are printed.
+    """
+    def report_status(self, status_message):
+        pass
+
+    def report_error(self, error_message):
+        print(f"Error: {error_message}", file=sys.stderr, flush=True)
+
+    def report_step_finished(self, step_name, finished_step_amount, step_amount, step_duration):
+        pass
+
+    def is_cancel_requested(self):
+        return False
+
+
+def get_accession(protein_number):
+    """
+    input:
+    protein_number = int
+    output:
+    accession = string, uniprot like accession, e.g. P00042
+    """
+    return f"{'PQO'[protein_number % 3]}{protein_number:05d}"
+
+
+def get_gene_name(accession):
+    """
+    The gene name the uniprot stand-in returns for an accession.
+    input:
+    accession = string
+    output:
+    gene_name = string
+    """
+    return f"GENE{accession.split('-')[0]}"
+
+
+def get_organism_index(accession):
+    """
+    input:
+    accession = string
+    output:
+    int, index in ORGANISM_NAMES
+    """
+    return int(accession.split("-")[0][1:]) % len(ORGANISM_NAMES)
+
+
+def generate_protein_groups_file(file_path, protein_group_amount, sample_amount, fraction_amount, seed=0):
+    """
+    Write a synthetic proteinGroups.txt with the column names of maxquant. Every protein gets a profile with a single peak per sample,
+    about 2% of the protein groups are reverse or contaminant hits and about 5% of the identifiers are isoforms.
+    input:
+    file_path = string
+    protein_group_amount = int
+    sample_amount = int
+    fraction_amount = int
+    seed = int, the same seed gives the same file
+    output:
+    None
+    """
+    random_generator = np.random.default_rng(seed)
+    accessions = [get_accession(protein_number) for protein_number in range(protein_group_amount)]
+    accessions = [f"{accession}-2" if is_isoform else accession
+                  for accession, is_isoform in zip(accessions, random_generator.random(protein_group_amount) < 0.05)]
+    decoy_prefixes = random_generator.choice(["", "REV__", "CON__"], size=protein_group_amount, p=[0.98, 0.01, 0.01])
+    majority_protein_ids = [f"{decoy_prefix}{accession}" for decoy_prefix, accession in zip(decoy_prefixes, accessions)]
+    fasta_headers = [f"sp|{accession}|{get_gene_name(accession)}_{ORGANISM_MNEMONICS[get_organism_index(accession)]} Synthetic protein {accession} "
+                     f"OS={ORGANISM_NAMES[get_organism_index(accession)]}" for accession in accessions]
+    protein_groups_columns = {"Protein IDs": majority_protein_ids,
+                              "Majority protein IDs": majority_protein_ids,
+                              "Fasta headers": fasta_headers,
+                              "Number of proteins": random_generator.integers(1, 5, protein_group_amount),
+                              "Peptides": random_generator.integers(1, 40, protein_group_amount),
+                              "Razor + unique peptides": random_generator.integers(1, 40, protein_group_amount),
+                              "Mol. weight [kDa]": np.round(random_generator.uniform(10, 250, protein_group_amount), 3),
+                              "Sequence length": random_generator.integers(80, 2500, protein_group_amount),
+                              "PEP": random_generator.uniform(0, 0.01, protein_group_amount),
+                              "Intensity": random_generator.uniform(1e5, 1e10, protein_group_amount),
+                              "MS/MS Count": random_generator.integers(1, 200, protein_group_amount),
+                              "iBAQ": random_generator.uniform(1e4, 1e9, protein_group_amount)}
+    fractions = np.arange(fraction_amount)
+    for sample_number in range(sample_amount):
+        sample_name = f"Sample{sample_number + 1}"
+        peak_fractions = random_generator.uniform(0, fraction_amount, protein_group_amount)
+        peak_widths = random_generator.uniform(0.5, 4, protein_group_amount)
+        peak_heights = random_generator.lognormal(12, 2, protein_group_amount)
+        profiles = peak_heights[:, None] * np.exp(-0.5 * ((fractions[None, :] - peak_fractions[:, None]) / peak_widths[:, None]) ** 2)
+        profiles[profiles < peak_heights[:, None] * 0.01] = 0
+        for fraction_number in fractions:
+            protein_groups_columns[f"iBAQ {sample_name}_{fraction_number + 1:02d}"] = np.round(profiles[:, fraction_number], 1)
+            protein_groups_columns[f"Intensity {sample_name}_{fraction_number + 1:02d}"] = np.round(profiles[:, fraction_number] * 10, 1)
+    pd.DataFrame(protein_groups_columns).to_csv(file_path, sep="\t", index=False)
+
+
+def generate_mitocarta_file(file_path, settings_dict, protein_group_amount, seed=0):
+    """
+    Write a mitocarta stand-in with a human and mouse sheet, about 10% of the synthetic genes are mitochondrial.
+    input:
+    file_path = string
+    settings_dict = dict["mitocarta_step"]
+    protein_group_amount = int
+    seed = int
+    output:
+    None
+    """
+    random_generator = np.random.default_rng(seed)
+    mitochondrial_accessions = [get_accession(protein_number) for protein_number in range(protein_group_amount) if random_generator.random() < 0.1]
+    with pd.ExcelWriter(file_path, engine="xlsxwriter") as writer:
+        for organism_index, sheet_name in enumerate((settings_dict["human_sheet_name"], settings_dict["mouse_sheet_name"])):
+            gene_names = [get_gene_name(accession) for accession in mitochondrial_accessions if get_organism_index(accession) == organism_index]
+            pd.DataFrame({settings_dict["mitocarta_symbol_column"]: [f"SYMBOL{gene_name}" for gene_name in gene_names],
+                          settings_dict["mitocarta_additional_symbol_column"]: [f"{gene_name}|ALIAS{gene_name}" for gene_name in gene_names]}
+                         ).to_excel(writer, sheet_name=sheet_name, index=False)
+
+
+def get_uniprot_recording(protein_group_amount):
+    """
+    The uniprot entries and string identifiers the mock uniprot server replays for the synthetic proteins. Like uniprot, the proteins api
+    returns an entry for the isoforms as well, while the mapping service only knows the canonical accessions.
+    input:
+    protein_group_amount = int
+    output:
+    recording = UniprotRecording
+    """
+    proteins, mapping = {}, {}
+    for protein_number in range(protein_group_amount):
+        canonical_accession = get_accession(protein_number)
+        for accession in (canonical_accession, f"{canonical_accession}-2"):
+            proteins[accession] = {"accession": accession,
+                                   "gene": [{"name": {"value": get_gene_name(accession)}}],
+                                   "protein": {"recommendedName": {"fullName": {"value": f"Synthetic protein {accession}"}}},
+                                   "organism": {"names": [{"type": "scientific", "value": ORGANISM_NAMES[get_organism_index(accession)]}]},
+                                   "comments": [{"type": "SUBCELLULAR_LOCATION", "locations": [{"location": {"value": "Mitochondrion"}}]}]}
+        mapping[canonical_accession] = f"9606.ENSP{canonical_accession}"
+    return UniprotRecording(proteins=proteins, mapping=mapping)
+
+
+def get_benchmark_settings(settings_dict, work_directory, uniprot_base_url, mitocarta_file_path, excel_file_name):
+    """
+    input:
+    settings_dict = dict, dictionary with user defined settings
+    work_directory = string, directory with the files of a single benchmark run
+    uniprot_base_url = string, base url of the uniprot stand-in
+    mitocarta_file_path = string
+    excel_file_name = string
+    output:
+    benchmark_settings_dict = dict
+    """
+    benchmark_settings_dict = copy.deepcopy(settings_dict)
+    uniprot_settings = benchmark_settings_dict["uniprot_step"]
+    uniprot_settings["uniprot_base_url"] = f"{uniprot_base_url}{PROTEINS_PATH}?"
+    uniprot_settings["string_linkout_parameters"]["uniprot_mapping_service_url"] = f"{uniprot_base_url}{MAPPING_PATH}"
+    uniprot_settings["uniprot_cache"]["cache_file_path"] = os.path.join(work_directory, "uniprot_annotation_cache.sqlite")
+    mitocarta_settings = benchmark_settings_dict["mitocarta_step"]
+    mitocarta_settings["mitocarta_human_ftp_link"] = mitocarta_file_path
+    mitocarta_settings["mitocarta_mouse_ftp_link"] = mitocarta_file_path
+    mitocarta_settings["mitocarta_reference_directory"] = os.path.join(work_directory, "mitocarta_reference")
+    benchmark_settings_dict["checkpoint_settings"]["use_checkpoints"] = 0
+    benchmark_settings_dict["checkpoint_settings"]["reuse_cluster_orders"] = 0
+    benchmark_settings_dict["make_excel_file_step"]["excel_file_name"] = excel_file_name
+    benchmark_settings_dict["make_excel_file_step"]["write_run_report"] = 1
+    return benchmark_settings_dict
+
+
+def run_benchmark(settings_dict, work_directory, uniprot_base_url, protein_group_amount, sample_amount, fraction_amount, repeats, seed):
+    """
+    Process a synthetic maxquant file repeats times. The first run starts with an empty uniprot cache and mitocarta reference store,
+    the later runs use the filled cache and store.
+    input:
+    settings_dict = dict, dictionary with user defined settings
+    work_directory = string
+    uniprot_base_url = string
+    protein_group_amount = int
+    sample_amount = int
+    fraction_amount = int
+    repeats = int
+    seed = int
+    output:
+    benchmark_results = list, one dict per run with the scale and the run report
+    """
+    scale_name = f"{protein_group_amount}_groups_{sample_amount}_samples_{fraction_amount}_fractions"
+    scale_directory = os.path.join(work_directory, scale_name)
+    os.makedirs(scale_directory, exist_ok=True)
+    maxquant_file_path = os.path.join(scale_directory, "proteinGroups.txt")
+    mitocarta_file_path = os.path.join(scale_directory, "mitocarta.xlsx")
+    generate_protein_groups_file(maxquant_file_path, protein_group_amount, sample_amount, fraction_amount, seed)
+    generate_mitocarta_file(mitocarta_file_path, settings_dict["mitocarta_step"], protein_group_amount, seed)
+    benchmark_settings_dict = get_benchmark_settings(settings_dict, scale_directory, uniprot_base_url, mitocarta_file_path,
+                                                     os.path.join(scale_directory, "processed_maxquant_file.xlsx"))
+    benchmark_results = []
+    for run_number in range(repeats):
+        is_pipeline_finished = process_maxquant_file(QuietReporter(), benchmark_settings_dict, maxquant_file_path)
+        with open(get_run_report_path(benchmark_settings_dict["make_excel_file_step"]["excel_file_name"])) as run_report_file:
+            run_report = json.load(run_report_file)
+        benchmark_results.append({"protein_groups": protein_group_amount, "samples": sample_amount, "fractions": fraction_amount,
+                                  "run": run_number + 1, "cache": "cold" if run_number == 0 else "warm",
+                                  "finished": is_pipeline_finished, "run_report": run_report})
+        print_benchmark_result(benchmark_results[-1])
+    return benchmark_results
+
+
+def print_benchmark_result(benchmark_result):
+    """
+    input:
+    benchmark_result = dict
+    output:
+    None
+    """
+    run_report = benchmark_result["run_report"]
+    step_durations = ", ".join(f"{step['step']} {step['wall_seconds']:.2f}s" for step in run_report["steps"])
+    print(f"{benchmark_result['protein_groups']} groups x {benchmark_result['samples']} samples x {benchmark_result['fractions']} fractions "
+          f"({benchmark_result['cache']} cache): {run_report['total_wall_seconds']:.2f}s, peak memory {run_report['process_peak_memory_mb']} MB\n    {step_durations}",
+          flush=True)
+
+
+def parse_arguments(arguments):
+    """
+    input:
+    arguments = list, command line arguments without the program name
+    output:
+    argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description="Benchmark process_maxquant on synthetic maxquant files with local uniprot and mitocarta stand-ins.")
+    parser.add_argument("--settings", default="maxquant_settings.json", help="settings file to benchmark (default: maxquant_settings.json)")
+    parser.add_argument("--protein-groups", type=int, nargs="+", default=[1000, 5000], help="amounts of protein groups (default: 1000 5000)")
+    parser.add_argument("--samples", type=int, nargs="+", default=[1, 4], help="amounts of samples (default: 1 4)")
+    parser.add_argument("--fractions", type=int, default=60, help="amount of fractions per sample (default: 60)")
+    parser.add_argument("--repeats", type=int, default=2, help="runs per scale, the first run has a cold cache (default: 2)")
+    parser.add_argument("--requests-per-second", type=float, default=None,
+                        help="overrides requests_per_second of the settings file, at most 10 (default: the value in the settings file)")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean delay of the mock uniprot server in seconds (default: 0)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of the uniprot requests answered with HTTP 429 or 503 (default: 0)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic data and the mock uniprot server (default: 0)")
+    parser.add_argument("--work-directory", default=None, help="directory for the synthetic files, by default a temporary directory")
+    parser.add_argument("--output", default="benchmark_results.json", help="json file with the results (default: benchmark_results.json)")
+    return parser.parse_args(arguments)
+
+
+def main(arguments):
+    """
+    input:
+    arguments = list, command line arguments without the program name
+    output:
+    int, exit code
+    """
+    arguments = parse_arguments(arguments)
+    with open(arguments.settings) as settings_file:
+        settings_dict = json.load(settings_file)
+    if arguments.requests_per_second is not None:
+        settings_dict["uniprot_step"]["requests_per_second"] = arguments.requests_per_second
+    uniprot_server = start_mock_uniprot_server(get_uniprot_recording(max(arguments.protein_groups)), latency=arguments.latency,
+                                               error_rate=arguments.error_rate, seed=arguments.seed)
+    uniprot_base_url = f"http://127.0.0.1:{uniprot_server.server_address[1]}"
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        work_directory = temporary_directory if arguments.work_directory is None else arguments.work_directory
+        benchmark_results = []
+        for protein_group_amount in arguments.protein_groups:
+            for sample_amount in arguments.samples:
+                benchmark_results += run_benchmark(settings_dict, work_directory, uniprot_base_url, protein_group_amount, sample_amount,
+                                                   arguments.fractions, arguments.repeats, arguments.seed)
+    uniprot_server.shutdown()
+    with open(arguments.output, "w") as output_file:
+        json.dump({"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "settings_file": os.path.abspath(arguments.settings),
+                   "results": benchmark_results}, output_file, indent=4)
+    print(f"The benchmark results are written to {arguments.output}")
+    return 0 if all(benchmark_result["finished"] for benchmark_result in benchmark_results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
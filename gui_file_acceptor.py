@@ -4,19 +4,113 @@ Description: This code serves to construct a gui, select input files and run the
 """
 import sys
 import logging
+import threading
+import multiprocessing
 from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QLabel, QGroupBox, QFileDialog, \
-    QVBoxLayout, QLineEdit, QHBoxLayout
-from PyQt5.QtCore import pyqtSlot, QProcess
+    QVBoxLayout, QLineEdit, QHBoxLayout, QProgressBar
+from PyQt5.QtCore import pyqtSlot, pyqtSignal, QObject, QThread
 
 from process_maxquant import check_user_input
-from process_maxquant import validate_user_parameters
 from process_maxquant import load_json
-from process_maxquant import read_in_protein_groups_file
-from process_maxquant import filter_dataframe_step
-from process_maxquant import fetch_uniprot_annotation_step
-from process_maxquant import is_protein_in_mitocarta_step
-from process_maxquant import apply_clustering_step
-from process_maxquant import dump_to_excel_step
+from process_maxquant import process_maxquant_file
+from process_maxquant import refresh_mitocarta_reference
+
+class PipelineWorker(QObject):
+    """
+    Executes the process_maxquant steps in a background thread. The worker acts as gui_object for the process_maxquant functions
+    and passes the messages on to the gui through signals, because widgets may only be changed from the main thread.
+    """
+    status_reported = pyqtSignal(str)
+    error_reported = pyqtSignal(str)
+    step_finished = pyqtSignal(str, int, int, float)
+    finished = pyqtSignal(bool)
+
+    def __init__(self, settings_file_path, maxquant_file_path):
+        """
+        input:
+        settings_file_path = string
+        maxquant_file_path = string
+        output:
+        None
+        """
+        super().__init__()
+        self.settings_file_path = settings_file_path
+        self.maxquant_file_path = maxquant_file_path
+        self.cancel_event = threading.Event()
+
+    @pyqtSlot()
+    def run(self):
+        is_pipeline_finished = False
+        try:
+            settings_dict, is_json_loaded = load_json(self, self.settings_file_path)
+            if is_json_loaded == True:
+                is_pipeline_finished = process_maxquant_file(self, settings_dict, self.maxquant_file_path)
+        except Exception as error:
+            logging.exception("A unhandled error has occurred while processing the maxquant file")
+            self.report_error(f"A unhandled error has occurred\n{error}")
+        self.finished.emit(is_pipeline_finished)
+
+    @pyqtSlot()
+    def refresh_mitocarta(self):
+        is_refresh_finished = False
+        try:
+            settings_dict, is_json_loaded = load_json(self, self.settings_file_path)
+            if is_json_loaded == True:
+                is_refresh_finished = refresh_mitocarta_reference(self, settings_dict)
+        except Exception as error:
+            logging.exception("A unhandled error has occurred while refreshing the mitocarta files")
+            self.report_error(f"A unhandled error has occurred\n{error}")
+        self.finished.emit(is_refresh_finished)
+
+    def report_status(self, status_message):
+        """"
+        input:
+        status_message = string
+        output:
+        None
+        """
+        self.status_reported.emit(status_message)
+
+    def report_error(self, error_message):
+        """"
+        input:
+        error_message = string
+        output:
+        None
+        """
+        self.error_reported.emit(error_message)
+
+    def report_step_finished(self, step_name, finished_step_amount, step_amount, step_duration):
+        """"
+        input:
+        step_name = string
+        finished_step_amount = int
+        step_amount = int
+        step_duration = float, seconds
+        output:
+        None
+        """
+        logging.info(f"Finished {step_name} in {step_duration:.1f} seconds")
+        self.step_finished.emit(step_name, finished_step_amount, step_amount, step_duration)
+
+    def request_cancel(self):
+        """"
+        Called from the main thread, the worker stops at the next check.
+        input:
+        None
+        output:
+        None
+        """
+        self.cancel_event.set()
+
+    def is_cancel_requested(self):
+        """"
+        input:
+        None
+        output:
+        boolean, True == the user clicked the cancel button
+        """
+        return self.cancel_event.is_set()
 
 class App(QWidget):
     def __init__(self):
@@ -26,6 +120,8 @@ class App(QWidget):
         self.top = 10
         self.width = 500
         self.height = 400
+        self.worker_thread = None
+        self.pipeline_worker = None
 
         self.create_gui_layout()
         windowLayout = QHBoxLayout()
@@ -81,6 +177,12 @@ class App(QWidget):
         self.error_message_label = QLabel("-")
         error_and_status_vertical_layout.addWidget(self.error_message_label)
 
+        step_duration_label = QLabel("Finished steps: ")
+        error_and_status_vertical_layout.addWidget(step_duration_label)
+
+        self.step_duration_message_label = QLabel("-")
+        error_and_status_vertical_layout.addWidget(self.step_duration_message_label)
+
         self.get_settings_file_button = QPushButton("Select the settings file", self)
         self.get_settings_file_button.setToolTip("Select the settings file where the file should be in the json format")
         self.get_settings_file_button.clicked.connect(self.openFileNameDialog)
@@ -91,6 +193,21 @@ class App(QWidget):
         self.process_maxquant_button.clicked.connect(self.execute_process_maxquant_script)
         main_vertical_layout.addWidget(self.process_maxquant_button)
 
+        self.refresh_mitocarta_button = QPushButton('Refresh mitocarta files', self)
+        self.refresh_mitocarta_button.setToolTip('Clicking this button will download the mitocarta files of the settings file again')
+        self.refresh_mitocarta_button.clicked.connect(self.execute_refresh_mitocarta)
+        main_vertical_layout.addWidget(self.refresh_mitocarta_button)
+
+        self.cancel_button = QPushButton('Cancel', self)
+        self.cancel_button.setToolTip('Clicking this button will stop the program after the current batch or sample')
+        self.cancel_button.clicked.connect(self.cancel_process_maxquant_script)
+        self.cancel_button.setEnabled(False)
+        main_vertical_layout.addWidget(self.cancel_button)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setValue(0)
+        main_vertical_layout.addWidget(self.progress_bar)
+
         self.error_and_status_message_group_box.setLayout(error_and_status_vertical_layout)
         self.verticalGroupBox.setLayout(main_vertical_layout)
 
@@ -105,6 +222,7 @@ class App(QWidget):
         elif self.sender() is self.get_maxquant_file_button:
             self.maxquant_file_input_field.setText(file_name)
 
+    @pyqtSlot(str)
     def report_status(self, status_message):
         """"
         input:
@@ -114,8 +232,8 @@ class App(QWidget):
         """
         self.status_message_label.setText(status_message)
         logging.info(status_message)
-        QApplication.processEvents()  # This line causes the gui to display the message
 
+    @pyqtSlot(str)
     def report_error(self, error_message):
         """"
         Report the error message and close the process of the corresponding button.
@@ -127,47 +245,135 @@ class App(QWidget):
         self.error_message_label.setText(error_message)
         self.report_status("An error has occurred, please see the error report below.")
 
+    @pyqtSlot(str, int, int, float)
+    def report_step_finished(self, step_name, finished_step_amount, step_amount, step_duration):
+        """"
+        input:
+        step_name = string
+        finished_step_amount = int
+        step_amount = int
+        step_duration = float, seconds
+        output:
+        None
+        """
+        self.progress_bar.setValue(round(100 * finished_step_amount / step_amount))
+        step_duration_message = f"{step_name}: {step_duration:.1f} seconds"
+        if self.step_duration_message_label.text() == "-":
+            self.step_duration_message_label.setText(step_duration_message)
+        else:
+            self.step_duration_message_label.setText(f"{self.step_duration_message_label.text()}\n{step_duration_message}")
+
     @pyqtSlot()
     def execute_process_maxquant_script(self):
+        if self.worker_thread is not None:
+            return
         self.process_maxquant_button.setEnabled(False)
+        self.refresh_mitocarta_button.setEnabled(False)
         self.error_message_label.setText("-")
+        self.step_duration_message_label.setText("-")
+        self.progress_bar.setValue(0)
         logging.basicConfig(filename="process_maxquant_log.log", filemode="w", level=logging.DEBUG)
 
         if check_user_input(self, self.settings_file_input_field.text(), self.maxquant_file_input_field.text()) == False:
             self.process_maxquant_button.setEnabled(True)
+            self.refresh_mitocarta_button.setEnabled(True)
             return
 
-        settings_dict, is_json_loaded = load_json(self, self.settings_file_input_field.text())
-        if is_json_loaded == False:
-            self.process_maxquant_button.setEnabled(True)
-            return
-
-        protein_groups_dataframe, is_maxquant_file_loaded = read_in_protein_groups_file(self, self.maxquant_file_input_field.text())
-        if is_maxquant_file_loaded == False:
-            self.process_maxquant_button.setEnabled(True)
-            return
+        self.start_pipeline_worker(PipelineWorker(self.settings_file_input_field.text(), self.maxquant_file_input_field.text()), "run")
+        self.cancel_button.setEnabled(True)
 
-        are_user_parameters_valid = validate_user_parameters(self, settings_dict, protein_groups_dataframe)
-        if are_user_parameters_valid == False:
-            self.process_maxquant_button.setEnabled(True)
+    @pyqtSlot()
+    def execute_refresh_mitocarta(self):
+        if self.worker_thread is not None:
             return
-
-        protein_groups_dataframe, filtered_groups_dataframe = filter_dataframe_step(self, protein_groups_dataframe,
-                                                                                    settings_dict)
-        protein_groups_dataframe = fetch_uniprot_annotation_step(self, protein_groups_dataframe, settings_dict)
-
-        protein_groups_dataframe, are_mitocarta_columns_present = is_protein_in_mitocarta_step(self, settings_dict, protein_groups_dataframe)
-        if are_mitocarta_columns_present == False:
-            self.process_maxquant_button.setEnabled(True)
+        self.error_message_label.setText("-")
+        logging.basicConfig(filename="process_maxquant_log.log", filemode="w", level=logging.DEBUG)
+        if self.settings_file_input_field.text() == "":
+            self.report_error("The settings file path was not selected.")
             return
+        self.process_maxquant_button.setEnabled(False)
+        self.refresh_mitocarta_button.setEnabled(False)
+        self.report_status("Downloading the mitocarta files again.")
+        self.start_pipeline_worker(PipelineWorker(self.settings_file_input_field.text(), None), "refresh_mitocarta")
 
-        protein_groups_dataframe = apply_clustering_step(self, settings_dict, protein_groups_dataframe)
+    def start_pipeline_worker(self, pipeline_worker, task_name):
+        """"
+        The worker runs in a separate thread so the gui stays responsive. The buttons are enabled again only once the thread has stopped,
+        so a new worker never replaces a thread which is still running.
+        input:
+        pipeline_worker = PipelineWorker
+        task_name = string, "run" or "refresh_mitocarta"
+        output:
+        None
+        """
+        self.worker_thread = QThread()
+        self.pipeline_worker = pipeline_worker
+        self.pipeline_worker.moveToThread(self.worker_thread)
+        self.worker_thread.started.connect(getattr(self.pipeline_worker, task_name))
+        self.pipeline_worker.status_reported.connect(self.report_status)
+        self.pipeline_worker.error_reported.connect(self.report_error)
+        self.pipeline_worker.step_finished.connect(self.report_step_finished)
+        if task_name == "run":
+            self.pipeline_worker.finished.connect(self.process_maxquant_script_finished)
+        else:
+            self.pipeline_worker.finished.connect(self.refresh_mitocarta_finished)
+        self.pipeline_worker.finished.connect(self.worker_thread.quit)
+        self.worker_thread.finished.connect(self.pipeline_worker.deleteLater)
+        self.worker_thread.finished.connect(self.worker_thread.deleteLater)
+        self.worker_thread.finished.connect(self.pipeline_worker_thread_finished)
+        self.worker_thread.start()
 
-        dump_to_excel_step(self, protein_groups_dataframe, filtered_groups_dataframe, settings_dict)
+    @pyqtSlot()
+    def cancel_process_maxquant_script(self):
+        self.cancel_button.setEnabled(False)
+        self.report_status("Cancelling, the program stops the uniprot requests or stops after the current sample.")
+        if self.pipeline_worker is not None:
+            self.pipeline_worker.request_cancel()
+
+    @pyqtSlot(bool)
+    def process_maxquant_script_finished(self, is_pipeline_finished):
+        self.cancel_button.setEnabled(False)
+        if is_pipeline_finished == True:
+            self.progress_bar.setValue(100)
+            self.report_status("The program has finished.")
+        elif self.pipeline_worker.is_cancel_requested() == True:
+            self.report_status("The program has been cancelled.")
+
+    @pyqtSlot(bool)
+    def refresh_mitocarta_finished(self, is_refresh_finished):
+        if is_refresh_finished == False:
+            self.report_status("The mitocarta files could not be refreshed.")
 
+    @pyqtSlot()
+    def pipeline_worker_thread_finished(self):
+        """"
+        The worker and its thread are deleted by Qt, so only now a new worker may be started.
+        input:
+        None
+        output:
+        None
+        """
+        self.worker_thread = None
+        self.pipeline_worker = None
         self.process_maxquant_button.setEnabled(True)
+        self.refresh_mitocarta_button.setEnabled(True)
+
+    def closeEvent(self, event):
+        """"
+        Stop the worker before the window closes, so the thread is not destroyed while it is running.
+        input:
+        event = QCloseEvent
+        output:
+        None
+        """
+        if self.worker_thread is not None and self.worker_thread.isRunning():
+            self.pipeline_worker.request_cancel()
+            self.worker_thread.wait()
+        event.accept()
 
 if __name__ == '__main__':
+    #needed for the clustering worker processes when the program runs as executable
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     ex = App()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,465 @@
+"""
+Description: This code serves to write the complexome profiles as a self-contained html report with a heatmap per sample.
+The heatmaps are drawn on a canvas in the browser, which stays fast for tens of thousands of proteins where the conditional
+formatting of the excel file becomes slow. The proteins can be shown in the order of the clustering per sample, the global
+clustering or the maxquant file, and can be searched by gene name or protein ID.
+"""
+import html
+import json
+import base64
+
+import numpy as np
+
+#code 0 is reserved for missing values, codes 1 to 255 follow the 3 color scale of the excel file
+COLOR_CODE_AMOUNT = 255
+COLOR_SCALE_PERCENTILE = 95
+
+HEATMAP_REPORT_TEMPLATE = r"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+body {margin: 0; font: 12px sans-serif; color: #222; overflow: hidden; user-select: none;}
+#controls {display: flex; gap: 8px; align-items: center; height: 32px; padding: 0 8px; border-bottom: 1px solid #ccc; white-space: nowrap;}
+#controls input[type=search] {width: 200px;}
+#matches, #position {color: #555;}
+#view {display: flex; gap: 12px; padding: 4px 8px 0 8px; overflow-x: auto; overflow-y: hidden;}
+.panel {flex: none;}
+.panel-title {height: 18px; line-height: 18px; font-weight: bold; white-space: nowrap; overflow: hidden;}
+canvas {display: block; cursor: grab;}
+#tooltip {position: fixed; display: none; pointer-events: none; z-index: 1; padding: 3px 6px; white-space: pre;
+          background: rgba(255, 255, 255, 0.95); border: 1px solid #888;}
+</style>
+</head>
+<body>
+<div id="controls">
+  <b>__TITLE__</b>
+  <label>Order <select id="order"></select></label>
+  <input id="search" type="search" placeholder="Search gene name or protein ID">
+  <button id="previous" title="Previous match (shift+enter)">&#9650;</button>
+  <button id="next" title="Next match (enter)">&#9660;</button>
+  <span id="matches"></span>
+  <button id="zoom-in" title="Zoom in (+ or ctrl+scroll)">+</button>
+  <button id="zoom-out" title="Zoom out (- or ctrl+scroll)">&minus;</button>
+  <button id="show-all" title="Show all proteins (home)">Show all</button>
+  <span id="position"></span>
+</div>
+<div id="view"></div>
+<div id="tooltip"></div>
+<script>
+"use strict";
+const DATA = __DATA__;
+const LABEL_WIDTH = 110, MARKER_WIDTH = 6, LABEL_ROW_PIXELS = 11, MAX_ROW_PIXELS = 24, TITLE_HEIGHT = 18;
+
+function decodeBase64(text) {
+  const binary = atob(text);
+  const bytes = new Uint8Array(binary.length);
+  for (let index = 0; index < binary.length; index++) bytes[index] = binary.charCodeAt(index);
+  return bytes;
+}
+
+//black - yellow at the 95th percentile - red, like the conditional formatting of the excel file
+function makePalette() {
+  const bytes = new Uint8ClampedArray(256 * 4);
+  bytes.set([221, 221, 221, 255], 0);
+  for (let code = 1; code < 256; code++) {
+    const position = (code - 1) / 254;
+    const color = position <= 0.5 ? [255 * position * 2, 255 * position * 2, 0] : [255, 255 * (1 - position) * 2, 0];
+    bytes.set([color[0], color[1], color[2], 255], code * 4);
+  }
+  return new Uint32Array(bytes.buffer);
+}
+const PALETTE = makePalette();
+const BACKGROUND = new Uint32Array(new Uint8ClampedArray([255, 255, 255, 255]).buffer)[0];
+
+const rowAmount = DATA.rowAmount;
+const orders = {};
+for (const [orderName, encodedOrder] of Object.entries(DATA.orders)) orders[orderName] = new Int32Array(decodeBase64(encodedOrder).buffer);
+const fileOrder = new Int32Array(rowAmount);
+for (let row = 0; row < rowAmount; row++) fileOrder[row] = row;
+const searchTexts = DATA.genes.map((gene, row) => `${gene} ${DATA.proteins[row]}`.toLowerCase());
+
+const state = {orderMode: "file", top: 0, rowsPerPixel: 1, matches: [], currentMatch: -1, isDrawPending: false, drag: null};
+let heatmapHeight = 100, cellWidth = 4;
+
+const panels = DATA.samples.map(sample => ({
+  name: sample.name, fractions: sample.fractions, orderName: sample.order, codes: decodeBase64(sample.codes),
+  pyramidPermutation: null, levels: null, positions: null, canvas: document.createElement("canvas"), hasLabels: false, heatmapLeft: 0
+}));
+
+function getPermutation(panel) {
+  if (state.orderMode === "sample" && panel.orderName !== null) return orders[panel.orderName];
+  if (state.orderMode === "global") return orders.global_clustered;
+  return fileOrder;
+}
+
+//level 0 holds the rows in the shown order, each next level holds the maximum of two rows of the previous level,
+//so a zoomed out view draws one level row per pixel without losing the peaks of the hidden proteins
+function updatePyramid(panel) {
+  const permutation = getPermutation(panel);
+  if (panel.pyramidPermutation === permutation) return;
+  const fractionAmount = panel.fractions.length;
+  let level = new Uint8Array(rowAmount * fractionAmount);
+  const positions = new Int32Array(rowAmount);
+  for (let position = 0; position < rowAmount; position++) {
+    const start = permutation[position] * fractionAmount;
+    level.set(panel.codes.subarray(start, start + fractionAmount), position * fractionAmount);
+    positions[permutation[position]] = position;
+  }
+  const levels = [level];
+  let levelRowAmount = rowAmount;
+  while (levelRowAmount > 1) {
+    const nextRowAmount = Math.ceil(levelRowAmount / 2);
+    const nextLevel = new Uint8Array(nextRowAmount * fractionAmount);
+    for (let row = 0; row < nextRowAmount; row++) {
+      const first = 2 * row * fractionAmount, second = first + fractionAmount, target = row * fractionAmount;
+      const hasSecond = 2 * row + 1 < levelRowAmount;
+      for (let fraction = 0; fraction < fractionAmount; fraction++) {
+        const firstCode = level[first + fraction], secondCode = hasSecond ? level[second + fraction] : 0;
+        nextLevel[target + fraction] = firstCode > secondCode ? firstCode : secondCode;
+      }
+    }
+    levels.push(nextLevel);
+    level = nextLevel;
+    levelRowAmount = nextRowAmount;
+  }
+  panel.pyramidPermutation = permutation;
+  panel.levels = levels;
+  panel.positions = positions;
+}
+
+function getMaxRowsPerPixel() {
+  return Math.max(rowAmount / heatmapHeight, 1 / MAX_ROW_PIXELS);
+}
+
+function clampView() {
+  state.rowsPerPixel = Math.min(Math.max(state.rowsPerPixel, 1 / MAX_ROW_PIXELS), getMaxRowsPerPixel());
+  state.top = Math.min(Math.max(state.top, 0), Math.max(0, rowAmount - heatmapHeight * state.rowsPerPixel));
+}
+
+function requestDraw() {
+  if (state.isDrawPending) return;
+  state.isDrawPending = true;
+  requestAnimationFrame(draw);
+}
+
+function draw() {
+  state.isDrawPending = false;
+  clampView();
+  for (const panel of panels) drawPanel(panel);
+  const lastRow = Math.min(rowAmount, Math.ceil(state.top + heatmapHeight * state.rowsPerPixel));
+  document.getElementById("position").textContent = `proteins ${Math.floor(state.top) + 1}-${lastRow} of ${rowAmount}`;
+}
+
+function drawPanel(panel) {
+  updatePyramid(panel);
+  const canvas = panel.canvas, context = canvas.getContext("2d");
+  const image = context.createImageData(canvas.width, heatmapHeight);
+  const pixels = new Uint32Array(image.data.buffer);
+  pixels.fill(BACKGROUND);
+  const fractionAmount = panel.fractions.length, rowsPerPixel = state.rowsPerPixel;
+  const levelIndex = rowsPerPixel <= 1 ? 0 : Math.min(panel.levels.length - 1, Math.ceil(Math.log2(rowsPerPixel)));
+  const level = panel.levels[levelIndex], levelScale = 2 ** levelIndex;
+  for (let y = 0; y < heatmapHeight; y++) {
+    const row = state.top + y * rowsPerPixel;
+    if (row >= rowAmount) break;
+    const levelStart = Math.floor(row / levelScale) * fractionAmount;
+    let pixel = y * canvas.width + panel.heatmapLeft;
+    for (let fraction = 0; fraction < fractionAmount; fraction++) {
+      const color = PALETTE[level[levelStart + fraction]];
+      for (let x = 0; x < cellWidth; x++) pixels[pixel++] = color;
+    }
+  }
+  context.putImageData(image, 0, 0);
+
+  const rowPixels = 1 / rowsPerPixel;
+  const markerLeft = panel.heatmapLeft - MARKER_WIDTH;
+  context.fillStyle = "#1f77ff";
+  for (let matchIndex = 0; matchIndex < state.matches.length; matchIndex++) {
+    const y = (panel.positions[state.matches[matchIndex]] - state.top) * rowPixels;
+    if (y < -rowPixels || y > heatmapHeight) continue;
+    context.fillRect(markerLeft, Math.floor(y), MARKER_WIDTH - 1, Math.max(2, rowPixels));
+    if (matchIndex === state.currentMatch) {
+      context.strokeStyle = "#1f77ff";
+      context.lineWidth = 2;
+      context.strokeRect(panel.heatmapLeft - 1, Math.floor(y) - 1, fractionAmount * cellWidth + 2, Math.max(2, rowPixels) + 2);
+    }
+  }
+
+  if (panel.hasLabels && rowPixels >= LABEL_ROW_PIXELS) {
+    const permutation = panel.pyramidPermutation;
+    context.fillStyle = "#222";
+    context.font = `${Math.min(12, Math.floor(rowPixels) - 1)}px sans-serif`;
+    context.textAlign = "right";
+    context.textBaseline = "middle";
+    for (let position = Math.floor(state.top); position < rowAmount; position++) {
+      const y = (position - state.top + 0.5) * rowPixels;
+      if (y > heatmapHeight) break;
+      context.fillText(getRowLabel(permutation[position]), markerLeft - 3, y, LABEL_WIDTH - 6);
+    }
+  }
+}
+
+function getRowLabel(row) {
+  return DATA.genes[row] !== "" ? DATA.genes[row] : DATA.proteins[row].split(";")[0];
+}
+
+function layoutPanels() {
+  const view = document.getElementById("view");
+  const controlsHeight = document.getElementById("controls").offsetHeight;
+  heatmapHeight = Math.max(50, window.innerHeight - controlsHeight - TITLE_HEIGHT - 8);
+  view.style.height = `${heatmapHeight + TITLE_HEIGHT + 4}px`;
+  for (const [panelIndex, panel] of panels.entries()) {
+    //the labels differ per sample when every sample has its own order, otherwise they are only shown next to the first sample
+    panel.hasLabels = state.orderMode === "sample" || panelIndex === 0;
+    panel.heatmapLeft = (panel.hasLabels ? LABEL_WIDTH : 0) + MARKER_WIDTH;
+    panel.canvas.width = panel.heatmapLeft + panel.fractions.length * cellWidth;
+    panel.canvas.height = heatmapHeight;
+  }
+  requestDraw();
+}
+
+function setupPanels() {
+  const view = document.getElementById("view");
+  const totalFractionAmount = panels.reduce((amount, panel) => amount + panel.fractions.length, 0);
+  const availableWidth = window.innerWidth - 16 - LABEL_WIDTH - panels.length * (MARKER_WIDTH + 12);
+  cellWidth = Math.min(12, Math.max(1, Math.floor(availableWidth / Math.max(1, totalFractionAmount))));
+  for (const panel of panels) {
+    const panelElement = document.createElement("div");
+    panelElement.className = "panel";
+    const title = document.createElement("div");
+    title.className = "panel-title";
+    title.textContent = panel.name;
+    panelElement.append(title, panel.canvas);
+    view.append(panelElement);
+    panel.canvas.addEventListener("mousemove", event => showTooltip(panel, event));
+    panel.canvas.addEventListener("mouseleave", () => { document.getElementById("tooltip").style.display = "none"; });
+  }
+}
+
+function showTooltip(panel, event) {
+  const tooltip = document.getElementById("tooltip");
+  const bounds = panel.canvas.getBoundingClientRect();
+  const fraction = Math.floor((event.clientX - bounds.left - panel.heatmapLeft) / cellWidth);
+  const firstPosition = Math.floor(state.top + (event.clientY - bounds.top) * state.rowsPerPixel);
+  if (state.drag !== null || fraction < 0 || fraction >= panel.fractions.length || firstPosition >= rowAmount) {
+    tooltip.style.display = "none";
+    return;
+  }
+  const lines = [`${panel.name}, ${panel.fractions[fraction]}`];
+  if (state.rowsPerPixel > 1) {
+    const lastPosition = Math.min(rowAmount, Math.floor(firstPosition + state.rowsPerPixel));
+    lines.push(`proteins ${firstPosition + 1}-${lastPosition}, the highest value is shown`, "zoom in to see single proteins");
+  } else {
+    const row = panel.pyramidPermutation[firstPosition];
+    lines.push(`gene: ${DATA.genes[row] || "-"}`, `proteins: ${DATA.proteins[row]}`, `position: ${firstPosition + 1}`);
+  }
+  tooltip.textContent = lines.join("\n");
+  tooltip.style.left = `${event.clientX + 14}px`;
+  tooltip.style.top = `${event.clientY + 14}px`;
+  tooltip.style.display = "block";
+}
+
+function zoom(factor, anchorY) {
+  const anchorRow = state.top + anchorY * state.rowsPerPixel;
+  state.rowsPerPixel *= factor;
+  clampView();
+  state.top = anchorRow - anchorY * state.rowsPerPixel;
+  requestDraw();
+}
+
+function showAll() {
+  state.rowsPerPixel = getMaxRowsPerPixel();
+  state.top = 0;
+  requestDraw();
+}
+
+function updateSearch() {
+  const query = document.getElementById("search").value.trim().toLowerCase();
+  state.matches = [];
+  state.currentMatch = -1;
+  if (query !== "") {
+    for (let row = 0; row < rowAmount; row++) {
+      if (searchTexts[row].includes(query)) state.matches.push(row);
+    }
+    updatePyramid(panels[0]);
+    state.matches.sort((first, second) => panels[0].positions[first] - panels[0].positions[second]);
+  }
+  document.getElementById("matches").textContent = query === "" ? "" : `${state.matches.length} matches`;
+  if (state.matches.length > 0) goToMatch(0);
+  requestDraw();
+}
+
+//the view is centred on the match in the first sample, the markers show the positions in the other samples
+function goToMatch(matchIndex) {
+  if (state.matches.length === 0) return;
+  state.currentMatch = (matchIndex + state.matches.length) % state.matches.length;
+  updatePyramid(panels[0]);
+  state.rowsPerPixel = Math.min(state.rowsPerPixel, 1 / (LABEL_ROW_PIXELS + 3));
+  state.top = panels[0].positions[state.matches[state.currentMatch]] - heatmapHeight * state.rowsPerPixel / 2;
+  document.getElementById("matches").textContent = `${state.currentMatch + 1} / ${state.matches.length} matches`;
+  requestDraw();
+}
+
+function setupControls() {
+  const orderSelect = document.getElementById("order");
+  const orderOptions = [];
+  if (panels.every(panel => panel.orderName !== null)) orderOptions.push(["sample", "clustering per sample"]);
+  if (orders.global_clustered !== undefined) orderOptions.push(["global", "global clustering"]);
+  orderOptions.push(["file", "maxquant file"]);
+  for (const [value, text] of orderOptions) orderSelect.add(new Option(text, value));
+  state.orderMode = orderOptions[0][0];
+  orderSelect.addEventListener("change", () => {
+    state.orderMode = orderSelect.value;
+    layoutPanels();
+    updateSearch();
+  });
+
+  let searchTimer = null;
+  const search = document.getElementById("search");
+  search.addEventListener("input", () => { clearTimeout(searchTimer); searchTimer = setTimeout(updateSearch, 150); });
+  search.addEventListener("keydown", event => {
+    if (event.key === "Enter") goToMatch(state.currentMatch + (event.shiftKey ? -1 : 1));
+  });
+  document.getElementById("previous").addEventListener("click", () => goToMatch(state.currentMatch - 1));
+  document.getElementById("next").addEventListener("click", () => goToMatch(state.currentMatch + 1));
+  document.getElementById("zoom-in").addEventListener("click", () => zoom(0.5, heatmapHeight / 2));
+  document.getElementById("zoom-out").addEventListener("click", () => zoom(2, heatmapHeight / 2));
+  document.getElementById("show-all").addEventListener("click", showAll);
+
+  const view = document.getElementById("view");
+  view.addEventListener("wheel", event => {
+    if (event.shiftKey) return;
+    event.preventDefault();
+    const deltaPixels = event.deltaY * (event.deltaMode === 1 ? 16 : event.deltaMode === 2 ? heatmapHeight : 1);
+    if (event.ctrlKey) {
+      zoom(Math.exp(deltaPixels * 0.002), event.clientY - panels[0].canvas.getBoundingClientRect().top);
+    } else {
+      state.top += deltaPixels * state.rowsPerPixel;
+      requestDraw();
+    }
+  }, {passive: false});
+  view.addEventListener("mousedown", event => {
+    state.drag = {y: event.clientY, top: state.top};
+    view.style.cursor = "grabbing";
+  });
+  window.addEventListener("mousemove", event => {
+    if (state.drag === null) return;
+    state.top = state.drag.top - (event.clientY - state.drag.y) * state.rowsPerPixel;
+    requestDraw();
+  });
+  window.addEventListener("mouseup", () => { state.drag = null; view.style.cursor = ""; });
+  window.addEventListener("keydown", event => {
+    if (event.target === search) return;
+    const pageRows = heatmapHeight * state.rowsPerPixel;
+    const actions = {
+      "ArrowDown": () => { state.top += pageRows / 20; }, "ArrowUp": () => { state.top -= pageRows / 20; },
+      "PageDown": () => { state.top += pageRows * 0.9; }, "PageUp": () => { state.top -= pageRows * 0.9; },
+      "End": () => { state.top = rowAmount; }, "Home": showAll,
+      "+": () => zoom(0.5, heatmapHeight / 2), "=": () => zoom(0.5, heatmapHeight / 2), "-": () => zoom(2, heatmapHeight / 2)
+    };
+    if (actions[event.key] === undefined) return;
+    event.preventDefault();
+    actions[event.key]();
+    requestDraw();
+  });
+  window.addEventListener("resize", layoutPanels);
+}
+
+setupControls();
+setupPanels();
+layoutPanels();
+showAll();
+</script>
+</body>
+</html>
+"""
+
+
+def write_heatmap_report(html_file_path, title, sample_fraction_matrices, sample_order_columns, global_order_column, gene_names, protein_ids):
+    """
+    Write the report as a single html file without external dependencies, the heatmap values and orders are embedded as base64 encoded arrays.
+    Per sample, the fraction values are stored as color codes of the 3 color scale which the excel file uses, the exact values are found in the other output files.
+    input:
+    html_file_path = string
+    title = string
+    sample_fraction_matrices = dict{sample_name : (fraction_names, np.array())}, 2D array with a row per protein and a column per fraction
+    sample_order_columns = dict{sample_name : np.array()}, the position of each protein in the clustering of the sample, missing samples are not clustered
+    global_order_column = np.array(), the position of each protein in the global clustering. None == the global clustering is not available
+    gene_names = list, the gene name of each protein, an empty string when the gene name is unknown
+    protein_ids = list, the protein IDs of each protein
+    output:
+    None
+    """
+    report_data = {"rowAmount": len(protein_ids), "genes": gene_names, "proteins": protein_ids, "samples": [], "orders": {}}
+    for sample_name, (fraction_names, fraction_matrix) in sample_fraction_matrices.items():
+        order_name = None
+        if sample_name in sample_order_columns:
+            order_name = f"sample_{sample_name}_clustered"
+            report_data["orders"][order_name] = encode_array(get_row_permutation(sample_order_columns[sample_name]))
+        report_data["samples"].append({"name": sample_name, "fractions": fraction_names, "order": order_name,
+                                       "codes": encode_array(get_color_codes(fraction_matrix))})
+    if global_order_column is not None:
+        report_data["orders"]["global_clustered"] = encode_array(get_row_permutation(global_order_column))
+
+    #a '</' inside the embedded json would close the script element
+    report_json = json.dumps(report_data).replace("</", "<\\/")
+    report_html = HEATMAP_REPORT_TEMPLATE.replace("__TITLE__", html.escape(title)).replace("__DATA__", report_json)
+    with open(html_file_path, "w", encoding="utf-8") as html_file:
+        html_file.write(report_html)
+
+
+def get_color_codes(fraction_matrix):
+    """
+    Convert the values of a sample to the color codes of a 3 color scale from the lowest value, via the COLOR_SCALE_PERCENTILE percentile
+    to the highest value, which is the same scale as the conditional formatting of the excel file.
+    input:
+    fraction_matrix = np.array(), 2D array with a row per protein and a column per fraction
+    output:
+    color_codes = np.array(), uint8 array with the shape of fraction_matrix, 0 == missing value
+    """
+    color_codes = np.zeros(fraction_matrix.shape, dtype=np.uint8)
+    is_value_present = np.isfinite(fraction_matrix)
+    present_values = fraction_matrix[is_value_present]
+    if present_values.size == 0:
+        return color_codes
+    minimum, middle, maximum = present_values.min(), np.percentile(present_values, COLOR_SCALE_PERCENTILE), present_values.max()
+    scale_positions = np.where(present_values <= middle, 0.5 * scale_values(present_values, minimum, middle),
+                               0.5 + 0.5 * scale_values(present_values, middle, maximum))
+    color_codes[is_value_present] = 1 + np.rint(np.clip(scale_positions, 0.0, 1.0) * (COLOR_CODE_AMOUNT - 1)).astype(np.uint8)
+    return color_codes
+
+
+def scale_values(values, start, end):
+    """
+    input:
+    values = np.array()
+    start = float
+    end = float
+    output:
+    np.array(), the values scaled from start == 0 to end == 1, all zero when start and end are equal
+    """
+    if end <= start:
+        return np.zeros(values.shape)
+    return (values - start) / (end - start)
+
+
+def get_row_permutation(order_column):
+    """
+    input:
+    order_column = np.array(), the position of each protein in the order, NaN for proteins without a position
+    output:
+    row_permutation = np.array(), little endian int32 array with the rows in the order, rows without a position are put at the end
+    """
+    return np.argsort(np.asarray(order_column, dtype="float64"), kind="stable").astype("<i4")
+
+
+def encode_array(array):
+    """
+    input:
+    array = np.array()
+    output:
+    string, the base64 encoded bytes of the array
+    """
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode("ascii")
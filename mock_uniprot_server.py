@@ -0,0 +1,233 @@
+"""
+Description: This code serves as a local stand-in for the uniprot proteins api and the uniprot mapping service. It replays recorded
+uniprot responses with a configurable latency and error rate, so the uniprot step can be run offline and benchmarked reproducibly.
+In the record mode the requests are forwarded to uniprot and the responses are added to the recording.
+"""
+import os.path
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+PROTEINS_PATH = "/proteins/api/proteins"
+MAPPING_PATH = "/uploadlists/"
+ERROR_STATUS_CODES = (429, 503)
+
+
+class UniprotRecording:
+    """
+    The recorded uniprot entries per accession and the recorded string identifiers per accession.
+    """
+    def __init__(self, recording_path=None, proteins=None, mapping=None):
+        """
+        input:
+        recording_path = string, json file the recording is read from and, in the record mode, written to. None == an in memory recording
+        proteins = dict{accession : uniprot entry}, used instead of the recording file
+        mapping = dict{accession : string identifier}, used instead of the recording file
+        output:
+        None
+        """
+        self.recording_path = recording_path
+        self.proteins = {} if proteins is None else proteins
+        self.mapping = {} if mapping is None else mapping
+        self.lock = threading.Lock()
+        if recording_path is not None and os.path.isfile(recording_path):
+            with open(recording_path) as recording_file:
+                recording = json.load(recording_file)
+            self.proteins.update(recording.get("proteins", {}))
+            self.mapping.update(recording.get("mapping", {}))
+
+    def get_proteins(self, accessions):
+        """
+        Like uniprot, accessions without an entry are left out of the response.
+        input:
+        accessions = list
+        output:
+        list, uniprot entries
+        """
+        return [self.proteins[accession] for accession in accessions if accession in self.proteins]
+
+    def get_mapping(self, accessions):
+        """
+        input:
+        accessions = list
+        output:
+        string, tab separated mapping in the format of the uniprot mapping service
+        """
+        mapping_lines = ["From\tTo"] + [f"{accession}\t{self.mapping[accession]}" for accession in accessions if accession in self.mapping]
+        return "\n".join(mapping_lines) + "\n"
+
+    def add(self, proteins, mapping):
+        """
+        Add recorded responses and write the recording to disk.
+        input:
+        proteins = dict{accession : uniprot entry}
+        mapping = dict{accession : string identifier}
+        output:
+        None
+        """
+        with self.lock:
+            self.proteins.update(proteins)
+            self.mapping.update(mapping)
+            if self.recording_path is None:
+                return
+            temporary_recording_path = f"{self.recording_path}.tmp"
+            with open(temporary_recording_path, "w") as recording_file:
+                json.dump({"proteins": self.proteins, "mapping": self.mapping}, recording_file)
+            os.replace(temporary_recording_path, self.recording_path)
+
+
+class MockUniprotRequestHandler(BaseHTTPRequestHandler):
+    """
+    The server attributes recording, latency, latency_jitter, error_rate, random_generator and upstream urls are set by start_mock_uniprot_server.
+    """
+    def log_message(self, format, *arguments):
+        pass
+
+    def do_GET(self):
+        if urlparse(self.path).path != PROTEINS_PATH:
+            self.send_body(404, b"", "text/plain")
+            return
+        if self.simulate_network() == False:
+            return
+        query = parse_qs(urlparse(self.path).query)
+        accessions = [accession for accession in query.get("accession", [""])[0].split(",") if accession != ""]
+        if self.server.upstream_proteins_url is not None:
+            upstream_response = requests.get(self.server.upstream_proteins_url, params={key: values[0] for key, values in query.items()},
+                                             headers={"Accept": "application/json"}, timeout=120)
+            if upstream_response.ok:
+                self.server.recording.add({entry["accession"]: entry for entry in upstream_response.json()}, {})
+            self.send_body(upstream_response.status_code, upstream_response.content, "application/json")
+            return
+        self.send_body(200, json.dumps(self.server.recording.get_proteins(accessions)).encode("utf-8"), "application/json")
+
+    def do_POST(self):
+        request_body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")
+        if urlparse(self.path).path != MAPPING_PATH:
+            self.send_body(404, b"", "text/plain")
+            return
+        if self.simulate_network() == False:
+            return
+        parameters = {key: values[0] for key, values in parse_qs(request_body).items()}
+        accessions = parameters.get("query", "").split()
+        if self.server.upstream_mapping_url is not None:
+            upstream_response = requests.post(self.server.upstream_mapping_url, data=parameters, timeout=120)
+            if upstream_response.ok:
+                mapping_lines = [mapping_line.split("\t") for mapping_line in upstream_response.text.splitlines()[1:]]
+                self.server.recording.add({}, {mapping_line[0]: mapping_line[1] for mapping_line in mapping_lines if len(mapping_line) == 2})
+            self.send_body(upstream_response.status_code, upstream_response.content, "text/plain")
+            return
+        self.send_body(200, self.server.recording.get_mapping(accessions).encode("utf-8"), "text/plain")
+
+    def simulate_network(self):
+        """
+        Wait for the configured latency and answer a fraction of the requests with an error.
+        input:
+        None
+        output:
+        boolean, True == answer the request and False == an error response has been sent
+        """
+        with self.server.random_lock:
+            latency = max(0.0, self.server.random_generator.gauss(self.server.latency, self.server.latency_jitter))
+            is_error = self.server.random_generator.random() < self.server.error_rate
+            error_status_code = self.server.random_generator.choice(ERROR_STATUS_CODES)
+        time.sleep(latency)
+        if is_error == False:
+            return True
+        self.send_response(error_status_code)
+        if error_status_code == 429:
+            self.send_header("Retry-After", "1")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return False
+
+    def send_body(self, status_code, body, content_type):
+        self.send_response(status_code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_mock_uniprot_server(recording, host="127.0.0.1", port=0, latency=0.0, latency_jitter=0.0, error_rate=0.0, seed=0,
+                              upstream_proteins_url=None, upstream_mapping_url=None):
+    """
+    input:
+    recording = UniprotRecording
+    host = string
+    port = int, 0 == a free port
+    latency = float, mean delay of every response in seconds
+    latency_jitter = float, standard deviation of the delay in seconds
+    error_rate = float, fraction of the requests answered with HTTP 429 (with Retry-After) or 503
+    seed = int, the same seed gives the same latencies and errors for the same order of requests
+    upstream_proteins_url = string, record mode: the proteins requests are forwarded to this url. None == replay mode
+    upstream_mapping_url = string, record mode: the mapping requests are forwarded to this url. None == replay mode
+    output:
+    server = ThreadingHTTPServer, serving in a daemon thread, the url is http://host:server.server_address[1]
+    """
+    server = ThreadingHTTPServer((host, port), MockUniprotRequestHandler)
+    server.daemon_threads = True
+    server.recording = recording
+    server.latency = latency
+    server.latency_jitter = latency_jitter
+    server.error_rate = error_rate
+    server.random_generator = random.Random(seed)
+    server.random_lock = threading.Lock()
+    server.upstream_proteins_url = upstream_proteins_url
+    server.upstream_mapping_url = upstream_mapping_url
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_arguments(arguments):
+    """
+    input:
+    arguments = list, command line arguments without the program name
+    output:
+    argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description="Local stand-in for the uniprot proteins api and mapping service.")
+    parser.add_argument("--recording", default="uniprot_recording.json", help="json file with the recorded responses (default: uniprot_recording.json)")
+    parser.add_argument("--host", default="127.0.0.1", help="(default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8800, help="(default: 8800)")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean delay of every response in seconds (default: 0)")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="standard deviation of the delay in seconds (default: 0)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of the requests answered with HTTP 429 or 503 (default: 0)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the latencies and errors (default: 0)")
+    parser.add_argument("--record", action="store_true", help="forward the requests to uniprot and add the responses to the recording")
+    parser.add_argument("--upstream-proteins-url", default="https://www.ebi.ac.uk/proteins/api/proteins", help="proteins api used in the record mode")
+    parser.add_argument("--upstream-mapping-url", default="https://www.uniprot.org/uploadlists/", help="mapping service used in the record mode")
+    return parser.parse_args(arguments)
+
+
+def main(arguments):
+    """
+    input:
+    arguments = list, command line arguments without the program name
+    output:
+    int, exit code
+    """
+    arguments = parse_arguments(arguments)
+    recording = UniprotRecording(arguments.recording)
+    server = start_mock_uniprot_server(recording, arguments.host, arguments.port, arguments.latency, arguments.latency_jitter, arguments.error_rate,
+                                       arguments.seed, arguments.upstream_proteins_url if arguments.record else None,
+                                       arguments.upstream_mapping_url if arguments.record else None)
+    base_url = f"http://{arguments.host}:{server.server_address[1]}"
+    print(f"{'Recording' if arguments.record else 'Replaying'} {len(recording.proteins)} proteins and {len(recording.mapping)} string identifiers "
+          f"from {arguments.recording}\nuniprot_base_url: {base_url}{PROTEINS_PATH}?\nuniprot_mapping_service_url: {base_url}{MAPPING_PATH}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
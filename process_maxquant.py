@@ -1,19 +1,68 @@
 #Import standard python libraries:
 import logging
+import copy
 import os.path
+import sys
 import requests
 import time
 import re
+import email.utils
 import json
+import hashlib
 import urllib.parse
-import urllib.request
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from multiprocessing.shared_memory import SharedMemory
 #Import third-part libraries
 import pandas as pd
 import numpy as np
 import scipy.spatial.distance as spd
+import scipy.cluster.hierarchy as sch
 import fastcluster as fastcluster
 import openpyxl
 import xlsxwriter
+from requests.adapters import HTTPAdapter
+
+from html_heatmap_report import write_heatmap_report
+
+#Increase UNIPROT_CACHE_VERSION whenever the format of the cached protein data changes, older entries are then ignored.
+UNIPROT_CACHE_VERSION = 2
+UNIPROT_CACHE_QUERY_SIZE = 500
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+#the waiting time between uniprot batches of older settings files, which had no requests_per_second
+DEFAULT_REQUEST_IDLE_TIME = 4
+#the values of the parameters which are missing from older settings files, these values keep the behaviour of the older versions
+UPGRADE_DEFAULT_SETTINGS = {
+    "filtering_step": {"PROTEIN_FILTER_MODE": "contains", "ADD_FRACTION_SUMMARY_COLUMNS": 0, "READ_CHUNK_SIZE": 50000},
+    "uniprot_step": {"retry_settings": {"max_retries": 0, "retry_backoff_seconds": 2, "timeout": {"connect_seconds": 10, "read_seconds": 60}},
+                     "uniprot_cache": {"use_cache": 0, "cache_file_path": "uniprot_annotation_cache.sqlite", "cache_expiration_days": 30, "cache_max_entries": 500000}},
+    "mitocarta_step": {"mitocarta_reference_directory": "mitocarta_reference"},
+    "clustering_step": {"memory_budget_mb": 0, "clustering_processes": 1, "optimal_leaf_ordering": 0},
+    "make_excel_file_step": {"write_run_report": 0, "output_formats": ["xlsx"]},
+    "checkpoint_settings": {"use_checkpoints": 0, "checkpoint_directory": "process_maxquant_checkpoints", "reuse_cluster_orders": 0,
+                            "cluster_order_expiration_days": 30, "cluster_order_max_files": 1000}}
+ISOFORM_SUFFIX_PATTERN = re.compile(r"-[0-9]+$")
+FRACTION_NUMBER_PATTERN = re.compile(r"_([0-9]+)$")
+#fastcluster.linkage_vector clusters the observations directly, without a distance matrix, for these methods:
+VECTOR_LINKAGE_METHODS = ("single", "centroid", "median", "ward")
+DISTANCE_CHUNK_BYTES = 64 * 1024 ** 2
+#Increase CHECKPOINT_VERSION whenever the steps change the dataframes differently, older checkpoints are then ignored.
+CHECKPOINT_VERSION = 5
+#the settings which only change how fast a step runs, they are left out of the checkpoint keys.
+#a clustering which is skipped because of the memory budget makes the clustering step incomplete, so it is never stored in a checkpoint
+CHECKPOINT_IGNORED_SETTINGS = {"clustering_step": ("clustering_processes", "memory_budget_mb")}
+CLUSTER_ORDER_VERSION = 2
+CLUSTER_ORDER_DIRECTORY_NAME = "cluster_orders"
+EXCEL_WRITE_CHUNK_ROWS = 5000
+FRACTION_DTYPE = "float32"
+CATEGORICAL_UNIPROT_COLUMNS = ("organism_name", "cell_compartment")
+#the columns with links are written as hyperlinks, excel allows at most 65530 hyperlinks per worksheet
+HYPERLINK_COLUMNS = ("uniprot_hyperlink", "string_linkout")
+OUTPUT_FORMATS = ("xlsx", "parquet", "feather", "tsv.gz", "html")
+EXCEL_MAX_HYPERLINKS_PER_WORKSHEET = 65530
+CHECKPOINT_STEPS = ("filtering_step", "uniprot_step", "mitocarta_step", "clustering_step")
+PIPELINE_STEPS = ("read_maxquant_file",) + CHECKPOINT_STEPS + ("make_excel_file_step",)
 
 
 def check_user_input(gui_object, settings_file_path, maxquant_file_path):
@@ -89,17 +138,89 @@ def load_json(gui_object, json_filepath):
     except Exception as error:
         log_error(gui_object, f"A unhandled error has occurred while reading {json_filepath}", error)
         return None, False
+    upgrade_settings(json_object)
     gui_object.report_status("Finished reading in the settings file")
     return json_object, True
 
 
+def upgrade_settings(settings_dict):
+    """
+    Settings files made for older versions miss the parameters that were added later. The missing parameters get the values of
+    UPGRADE_DEFAULT_SETTINGS, which keep the behaviour of the version without the parameter, parameters which are present are never changed.
+    input:
+    settings_dict = dict{parameter: [values]}, changed in place
+    output:
+    None
+    """
+    if isinstance(settings_dict, dict) == False:
+        return
+    upgrade_request_rate_settings(settings_dict)
+    add_missing_settings(settings_dict, UPGRADE_DEFAULT_SETTINGS)
+
+
+def add_missing_settings(settings_dict, default_settings):
+    """
+    input:
+    settings_dict = dict, changed in place
+    default_settings = dict, nested dictionaries are added per parameter
+    output:
+    None
+    """
+    for parameter_name, default_value in default_settings.items():
+        if parameter_name not in settings_dict:
+            settings_dict[parameter_name] = copy.deepcopy(default_value)
+        elif isinstance(default_value, dict) and isinstance(settings_dict[parameter_name], dict):
+            add_missing_settings(settings_dict[parameter_name], default_value)
+
+
+def upgrade_request_rate_settings(settings_dict):
+    """
+    Settings files made for older versions wait request_idle_time seconds between the uniprot batches instead of limiting
+    the requests per second, the old waiting time is converted to requests_per_second and the batches are queried one at a time.
+    input:
+    settings_dict = dict{parameter: [values]}, changed in place
+    output:
+    None
+    """
+    uniprot_settings = settings_dict.get("uniprot_step") if isinstance(settings_dict, dict) else None
+    if isinstance(uniprot_settings, dict) == False:
+        return
+    if "requests_per_second" not in uniprot_settings:
+        request_idle_time = uniprot_settings.get("request_idle_time", DEFAULT_REQUEST_IDLE_TIME)
+        if isinstance(request_idle_time, (int, float)) and request_idle_time > 0:
+            uniprot_settings["requests_per_second"] = min(1 / request_idle_time, 10)
+        else:
+            uniprot_settings["requests_per_second"] = 1 / DEFAULT_REQUEST_IDLE_TIME
+    if "max_concurrent_requests" not in uniprot_settings:
+        uniprot_settings["max_concurrent_requests"] = 1
+
+
 def validate_user_parameters(gui_object, settings_dict, protein_groups_dataframe):
     """
-    Validate whether the user parameters are valid.
+    Validate whether the user parameters are valid, a parameter missing from the settings file is reported instead of raising an error.
     input:
     gui_object = PyQt5 Qapplication
     settings_dict = dict{parameter: [values]}
-    protein_groups_dataframe = pd.Dataframe()
+    protein_groups_dataframe = pd.Dataframe(), the maxquant file or only its header, None whenever the columns are not validated
+    output:
+    boolean, True == the user parameters are not valid and False == the user parameters are valid
+    """
+    try:
+        return are_user_parameters_valid(gui_object, settings_dict, protein_groups_dataframe)
+    except KeyError as key_error:
+        gui_object.report_error(f"The parameter {key_error} is missing from the settings file, compare the settings file with the example maxquant_settings.json.")
+        return False
+    except TypeError as type_error:
+        gui_object.report_error(f"The settings file doesn't have the expected structure, compare the settings file with the example maxquant_settings.json.\n{type_error}")
+        return False
+
+
+def are_user_parameters_valid(gui_object, settings_dict, protein_groups_dataframe):
+    """
+    input:
+    gui_object = PyQt5 Qapplication
+    settings_dict = dict{parameter: [values]}
+    protein_groups_dataframe = pd.Dataframe(), the maxquant file or only its header, None whenever the columns are not validated
     output:
     boolean, True == the user parameters are not valid and False == the user parameters are valid
     """
@@ -108,19 +229,49 @@ def validate_user_parameters(gui_object, settings_dict, protein_groups_dataframe
     if is_input_parameter_valid(gui_object, dict, settings_dict["uniprot_step"]["uniprot_options"], "uniprot_options") == False: return False
     if are_values_true_or_false(settings_dict["uniprot_step"]["uniprot_options"], gui_object) == False: return False
     if is_input_parameter_valid(gui_object, list, settings_dict["filtering_step"]["EXACT_MATCHES"], "EXACT_MATCHES") == False: return False
-    if are_columns_in_data(settings_dict["filtering_step"]["EXACT_MATCHES"], protein_groups_dataframe, gui_object) == False: return False
-    if is_input_parameter_valid(gui_object, int, settings_dict["uniprot_step"]["request_idle_time"], "request_idle_time") == False: return False
-    if is_request_idle_time_valid(settings_dict["uniprot_step"]["request_idle_time"], gui_object) == False: return False
+    if is_input_parameter_valid(gui_object, str, settings_dict["filtering_step"]["PROTEIN_FILTER_MODE"], "PROTEIN_FILTER_MODE") == False: return False
+    if is_protein_filter_mode_valid(settings_dict["filtering_step"]["PROTEIN_FILTER_MODE"], gui_object) == False: return False
+    if is_input_parameter_valid(gui_object, int, settings_dict["filtering_step"]["ADD_FRACTION_SUMMARY_COLUMNS"], "ADD_FRACTION_SUMMARY_COLUMNS") == False: return False
+    if is_input_parameter_valid(gui_object, int, settings_dict["filtering_step"]["READ_CHUNK_SIZE"], "READ_CHUNK_SIZE") == False: return False
+    if protein_groups_dataframe is not None and are_columns_in_data(settings_dict["filtering_step"]["EXACT_MATCHES"], protein_groups_dataframe, gui_object) == False: return False
+    if is_input_parameter_valid(gui_object, (int, float), settings_dict["uniprot_step"]["requests_per_second"], "requests_per_second") == False: return False
+    if is_requests_per_second_valid(settings_dict["uniprot_step"]["requests_per_second"], gui_object) == False: return False
+    if is_input_parameter_valid(gui_object, int, settings_dict["uniprot_step"]["max_concurrent_requests"], "max_concurrent_requests") == False: return False
+    if is_max_concurrent_requests_valid(settings_dict["uniprot_step"]["max_concurrent_requests"], gui_object) == False: return False
     if is_input_parameter_valid(gui_object, int, settings_dict["uniprot_step"]["batch_amount"], "batch_amount") == False: return False
     if is_batch_amount_valid(settings_dict["uniprot_step"]["batch_amount"], gui_object) == False: return False
+    if is_input_parameter_valid(gui_object, int, settings_dict["uniprot_step"]["retry_settings"]["max_retries"], "max_retries") == False: return False
+    if is_max_retries_valid(settings_dict["uniprot_step"]["retry_settings"]["max_retries"], gui_object) == False: return False
+    if is_input_parameter_valid(gui_object, (int, float), settings_dict["uniprot_step"]["retry_settings"]["retry_backoff_seconds"], "retry_backoff_seconds") == False: return False
+    if is_input_parameter_valid(gui_object, dict, settings_dict["uniprot_step"]["retry_settings"]["timeout"], "timeout") == False: return False
+    if is_input_parameter_valid(gui_object, (int, float), settings_dict["uniprot_step"]["retry_settings"]["timeout"]["connect_seconds"], "connect_seconds") == False: return False
+    if is_input_parameter_valid(gui_object, (int, float), settings_dict["uniprot_step"]["retry_settings"]["timeout"]["read_seconds"], "read_seconds") == False: return False
+    if is_request_timeout_valid(settings_dict["uniprot_step"]["retry_settings"]["timeout"], gui_object) == False: return False
+    if is_input_parameter_valid(gui_object, dict, settings_dict["uniprot_step"]["uniprot_cache"], "uniprot_cache") == False: return False
+    if is_input_parameter_valid(gui_object, int, settings_dict["uniprot_step"]["uniprot_cache"]["use_cache"], "use_cache") == False: return False
+    if is_input_parameter_valid(gui_object, str, settings_dict["uniprot_step"]["uniprot_cache"]["cache_file_path"], "cache_file_path") == False: return False
+    if is_input_parameter_valid(gui_object, int, settings_dict["uniprot_step"]["uniprot_cache"]["cache_expiration_days"], "cache_expiration_days") == False: return False
+    if is_input_parameter_valid(gui_object, int, settings_dict["uniprot_step"]["uniprot_cache"]["cache_max_entries"], "cache_max_entries") == False: return False
     if is_input_parameter_valid(gui_object, int, settings_dict["mitocarta_step"]["evaluate_symbol_column"], "evaluate_symbol_column") == False: return False
     if is_input_parameter_valid(gui_object, int, settings_dict["mitocarta_step"]["evaluate_additional_symbol_column"], "evaluate_additional_symbol_column") == False: return False
+    if is_input_parameter_valid(gui_object, str, settings_dict["mitocarta_step"]["mitocarta_reference_directory"], "mitocarta_reference_directory") == False: return False
     if is_input_parameter_valid(gui_object, str, settings_dict["clustering_step"]["method"], "method") == False: return False
     if is_clustering_method_valid(settings_dict["clustering_step"]["method"], gui_object) == False: return False
     if is_input_parameter_valid(gui_object, str, settings_dict["clustering_step"]["metric"], "metric") == False: return False
     if is_clustering_metric_valid(settings_dict["clustering_step"]["metric"], gui_object) == False: return False
+    if is_input_parameter_valid(gui_object, int, settings_dict["clustering_step"]["memory_budget_mb"], "memory_budget_mb") == False: return False
+    if is_input_parameter_valid(gui_object, int, settings_dict["clustering_step"]["clustering_processes"], "clustering_processes") == False: return False
+    if is_input_parameter_valid(gui_object, int, settings_dict["clustering_step"]["optimal_leaf_ordering"], "optimal_leaf_ordering") == False: return False
     if is_input_parameter_valid(gui_object, str, settings_dict["make_excel_file_step"]["excel_file_name"], "excel_file_name") == False: return False
     if is_excel_directory_valid(settings_dict["make_excel_file_step"]["excel_file_name"], gui_object) == False: return False
+    if is_input_parameter_valid(gui_object, int, settings_dict["make_excel_file_step"]["write_run_report"], "write_run_report") == False: return False
+    if is_input_parameter_valid(gui_object, list, settings_dict["make_excel_file_step"]["output_formats"], "output_formats") == False: return False
+    if are_output_formats_valid(settings_dict["make_excel_file_step"]["output_formats"], gui_object) == False: return False
+    if is_input_parameter_valid(gui_object, int, settings_dict["checkpoint_settings"]["use_checkpoints"], "use_checkpoints") == False: return False
+    if is_input_parameter_valid(gui_object, str, settings_dict["checkpoint_settings"]["checkpoint_directory"], "checkpoint_directory") == False: return False
+    if is_input_parameter_valid(gui_object, int, settings_dict["checkpoint_settings"]["reuse_cluster_orders"], "reuse_cluster_orders") == False: return False
+    if is_input_parameter_valid(gui_object, int, settings_dict["checkpoint_settings"]["cluster_order_expiration_days"], "cluster_order_expiration_days") == False: return False
+    if is_input_parameter_valid(gui_object, int, settings_dict["checkpoint_settings"]["cluster_order_max_files"], "cluster_order_max_files") == False: return False
     return True
 
 
@@ -136,8 +287,8 @@ def is_input_parameter_valid(gui_object, assumed_input_type, input_parameter, pa
     """
     if isinstance(input_parameter, assumed_input_type):
         return True
-    gui_object.report_error(gui_object, f"The assumed input type {input_parameter} for parameter {parameter_name} is not the actual input type.\n"
-                                        f"Make sure that the settings file has the assumed input parameter for parameter {parameter_name}.")
+    gui_object.report_error(f"The assumed input type {input_parameter} for parameter {parameter_name} is not the actual input type.\n"
+                            f"Make sure that the settings file has the assumed input parameter for parameter {parameter_name}.")
     return False
 
 
@@ -172,19 +323,90 @@ def are_columns_in_data(list_of_column_names, dataframe, gui_object):
     return True
 
 
-def is_request_idle_time_valid(request_idle_time, gui_object):
+def is_protein_filter_mode_valid(protein_filter_mode, gui_object):
+    """
+    input:
+    protein_filter_mode = string
+    output:
+    boolean, True == protein_filter_mode is a valid mode and False == protein_filter_mode is an invalid mode
+    """
+    valid_protein_filter_modes = ["contains", "prefix"]
+    if protein_filter_mode not in valid_protein_filter_modes:
+        gui_object.report_error(f"The submitted protein filter mode {protein_filter_mode} is not among the protein filter modes:\n{*valid_protein_filter_modes,}")
+        return False
+    return True
+
+
+def are_output_formats_valid(output_formats, gui_object):
+    """
+    input:
+    output_formats = list
+    output:
+    boolean, True == all output formats are valid and False == an output format is invalid or no output format is given
+    """
+    if len(output_formats) == 0:
+        gui_object.report_error(f"No output format is given, choose one or more of the output formats:\n{*OUTPUT_FORMATS,}")
+        return False
+    for output_format in output_formats:
+        if output_format not in OUTPUT_FORMATS:
+            gui_object.report_error(f"The submitted output format {output_format} is not among the output formats:\n{*OUTPUT_FORMATS,}")
+            return False
+    return True
+
+
+def is_requests_per_second_valid(requests_per_second, gui_object):
+    """
+    input:
+    requests_per_second = int or float
+    output:
+    boolean, True == requests_per_second is valid and False == requests_per_second is not valid
+    """
+    if 0 < requests_per_second <= 10:
+        return True
+    gui_object.report_error(f"The requests_per_second is {requests_per_second}, but it should be bigger than 0 and at most 10 to prevent being blacklisted by uniprot")
+    return False
+
+
+def is_max_concurrent_requests_valid(max_concurrent_requests, gui_object):
+    """
+    input:
+    max_concurrent_requests = int
+    output:
+    boolean, True == max_concurrent_requests is valid and False == max_concurrent_requests is not valid
+    """
+    if max_concurrent_requests > 0:
+        return True
+    gui_object.report_error(f"The max_concurrent_requests is {max_concurrent_requests}, but at least 1 request should be allowed to query uniprot")
+    return False
+
+
+def is_max_retries_valid(max_retries, gui_object):
     """
     input:
-    request_idle_time = int
+    max_retries = int
     output:
-    boolean, True == request_idle_time is valid and False == request_idle_time is not valid
+    boolean, True == max_retries is valid and False == max_retries is not valid
     """
-    if request_idle_time > 1:
+    if max_retries >= 0:
         return True
-    gui_object.report_error(f"The request_idle_time is {request_idle_time}, but it should be bigger than 1 to prevent being blacklisted by uniprot")
+    gui_object.report_error(f"The max_retries is {max_retries}, but it should be 0 or bigger, 0 means that a failed batch is not queried again")
     return False
 
 
+def is_request_timeout_valid(timeout_settings, gui_object):
+    """
+    input:
+    timeout_settings = dict{"connect_seconds":int or float, "read_seconds":int or float}
+    output:
+    boolean, True == the timeouts are valid and False == the timeouts are not valid
+    """
+    for timeout_name in ("connect_seconds", "read_seconds"):
+        if timeout_settings[timeout_name] <= 0:
+            gui_object.report_error(f"The {timeout_name} timeout is {timeout_settings[timeout_name]}, but it should be bigger than 0 so a request to uniprot can't wait forever")
+            return False
+    return True
+
+
 def is_batch_amount_valid(batch_amount, gui_object):
     """
     The batch amount should be greater than 0(1 is valid) and smaller than 100.
@@ -246,17 +468,28 @@ def is_excel_directory_valid(output_location, gui_object):
     return True
 
 
-def read_in_protein_groups_file(gui_object, filename):
+def read_in_protein_groups_file(gui_object, filename, settings_dict):
     """
+    Whenever the filtering step is enabled, only the columns retained by the filtering step are read and the iBAQ columns are read as float32.
+    The file is read in chunks of READ_CHUNK_SIZE rows, so the memory use depends on the retained columns instead of the complete file.
     input:
     gui_object = PyQt5 Qapplication
     string, path of proteingroups file
+    settings_dict = dict, dictionary with user defined settings
     output:
     protein_groups_dataframe = pd.DataFrame
     """
     gui_object.report_status(f"Start reading in \'{filename}\'")
     try:
-        protein_groups_dataframe = pd.read_csv(filename, sep='\t', index_col="Majority protein IDs", low_memory=False)
+        header_columns = pd.read_csv(filename, sep='\t', nrows=0).columns.tolist()
+        used_columns, column_dtypes = get_protein_groups_columns(header_columns, settings_dict)
+        read_chunk_size = settings_dict["filtering_step"]["READ_CHUNK_SIZE"]
+        if read_chunk_size > 0:
+            protein_groups_chunks = pd.read_csv(filename, sep='\t', index_col="Majority protein IDs", usecols=used_columns, dtype=column_dtypes,
+                                                low_memory=False, chunksize=read_chunk_size)
+            protein_groups_dataframe = pd.concat(protein_groups_chunks)
+        else:
+            protein_groups_dataframe = pd.read_csv(filename, sep='\t', index_col="Majority protein IDs", usecols=used_columns, dtype=column_dtypes, low_memory=False)
     except FileNotFoundError as file_not_found_error:
         log_error(gui_object, f"The maxquant file \'{filename}\' was not found, please try again.", file_not_found_error)
         return None, False
@@ -271,6 +504,43 @@ def read_in_protein_groups_file(gui_object, filename):
     gui_object.report_status("Finished reading in the maxquant file")
     return protein_groups_dataframe, True
 
+def read_in_protein_groups_header(gui_object, filename):
+    """
+    Only the header of the proteingroups file is read, so the column names can be validated without reading the complete file.
+    input:
+    gui_object = PyQt5 Qapplication
+    filename = string, path of proteingroups file
+    output:
+    header_dataframe = pd.DataFrame, without rows, None whenever the header could not be read
+    """
+    try:
+        return pd.read_csv(filename, sep='\t', nrows=0)
+    except FileNotFoundError as file_not_found_error:
+        log_error(gui_object, f"The maxquant file \'{filename}\' was not found, please try again.", file_not_found_error)
+    except Exception as error:
+        log_error(gui_object, f"Something went wrong while reading in the header of \'{filename}\', please see the error below:", error)
+    return None
+
+def get_protein_groups_columns(header_columns, settings_dict):
+    """
+    Resolve which columns of the proteingroups file should be read, based on the header of the file and the EXACT_MATCHES and CONTAINS settings.
+    input:
+    header_columns = list, the column names of the proteingroups file
+    settings_dict = dict, dictionary with user defined settings
+    output:
+    used_columns = list, list of column names, None whenever all columns should be read
+    column_dtypes = dict{column_name : dtype}
+    """
+    if settings_dict["steps_dict"]["filtering_step"] == False:
+        return None, {}
+    used_columns = ["Majority protein IDs"]
+    for key_word, method in zip(["EXACT_MATCHES", "CONTAINS"], ["exact_matches", "contains"]):
+        for selected_column in select_columns(header_columns, settings_dict["filtering_step"][key_word], method):
+            if selected_column not in used_columns:
+                used_columns.append(selected_column)
+    column_dtypes = {column: FRACTION_DTYPE for column in used_columns if column.startswith("iBAQ")}
+    return used_columns, column_dtypes
+
 def log_error(gui_object, error_message, exception):
     """"
     This function is meant to generalize the code under each exception clause
@@ -292,18 +562,92 @@ def read_in_excel_file(gui_object, filename, sheet_name):
     filename = string
     sheet_name = string
     output:
-    dataframe = pd.DataFrame()
+    dataframe = pd.DataFrame(), None whenever the excel file could not be read
     """
     gui_object.report_status(f"Start reading in the excel file {filename} for sheet {sheet_name}.")
     try:
         dataframe = pd.read_excel(io=filename, sheet_name=sheet_name, index_col=None, na_filter=False)
     except FileNotFoundError as file_not_found_error:
         log_error(gui_object, f"The excel file \'{filename}\' has not been found at the specified location", file_not_found_error)
+        return None
     except Exception as error:
         log_error(gui_object, f"Something went wrong while reading in the excel file \'{filename}\'", error)
+        return None
     gui_object.report_status(f"Successfully created a dataframe from excel file \'{filename}\' with sheet {sheet_name}.")
     return dataframe
 
+def load_mitocarta_reference(gui_object, mitocarta_link, sheet_name, reference_directory, refresh_reference):
+    """
+    Load a mitocarta sheet from the local reference store. Only whenever the sheet has not been stored yet, or refresh_reference is given,
+    the excel file is downloaded and converted to a parquet snapshot, so later runs don't need the internet and skip parsing the excel file.
+    The snapshots are stored as parquet instead of pickle, because reading a pickle file from a shared directory could execute any code in it.
+    input:
+    gui_object = PyQt5, Qapplication
+    mitocarta_link = string, link to the mitocarta excel file, a different link (version) results in a different snapshot
+    sheet_name = string
+    reference_directory = string, directory of the reference store
+    refresh_reference = boolean, True == download the excel file again even when a snapshot is present
+    output:
+    dataframe = pd.DataFrame(), None whenever the mitocarta sheet could not be loaded
+    """
+    snapshot_path = get_mitocarta_snapshot_path(reference_directory, mitocarta_link, sheet_name)
+    if os.path.isfile(snapshot_path) and refresh_reference == False:
+        try:
+            dataframe = pd.read_parquet(snapshot_path)
+            gui_object.report_status(f"Loaded the mitocarta sheet {sheet_name} from \'{snapshot_path}\', downloaded on {time.ctime(os.path.getmtime(snapshot_path))}.")
+            return dataframe
+        except Exception as error:
+            logging.error(f"The mitocarta snapshot \'{snapshot_path}\' could not be read and is downloaded again: {error}")
+
+    dataframe = read_in_excel_file(gui_object, mitocarta_link, sheet_name)
+    if dataframe is None:
+        return None
+    #without na_filter the empty cells of numeric columns are empty strings, parquet needs one type per column so these columns are stored as text
+    mixed_columns = [column for column in dataframe.columns if dataframe[column].dtype == object and pd.api.types.infer_dtype(dataframe[column]).startswith("mixed")]
+    dataframe[mixed_columns] = dataframe[mixed_columns].astype(str)
+    try:
+        os.makedirs(reference_directory, exist_ok=True)
+        #write to a temporary file first, so other processes never read a half written snapshot, the modification time of the snapshot is the download time
+        temporary_snapshot_path = f"{snapshot_path}.{os.getpid()}.tmp"
+        dataframe.to_parquet(temporary_snapshot_path, engine="pyarrow")
+        os.replace(temporary_snapshot_path, snapshot_path)
+        logging.info(f"Stored the mitocarta sheet {sheet_name} from {mitocarta_link} at \'{snapshot_path}\'")
+    except Exception as error:
+        log_error(gui_object, f"The mitocarta sheet {sheet_name} could not be stored in \'{reference_directory}\', it will be downloaded again during the next run.", error)
+    return dataframe
+
+def refresh_mitocarta_reference(gui_object, settings_dict):
+    """
+    Download the human and mouse mitocarta files again and replace their snapshots in the reference store,
+    e.g. whenever a new mitocarta release is published at the same link.
+    input:
+    gui_object = PyQt5, Qapplication
+    settings_dict = dict, dictionary with user defined settings
+    output:
+    boolean, True == both mitocarta files were downloaded and False == a mitocarta file could not be downloaded
+    """
+    mitocarta_settings = settings_dict["mitocarta_step"]
+    for mitocarta_link, sheet_name in ((mitocarta_settings["mitocarta_human_ftp_link"], mitocarta_settings["human_sheet_name"]),
+                                       (mitocarta_settings["mitocarta_mouse_ftp_link"], mitocarta_settings["mouse_sheet_name"])):
+        if load_mitocarta_reference(gui_object, mitocarta_link, sheet_name, mitocarta_settings["mitocarta_reference_directory"], True) is None:
+            return False
+    gui_object.report_status(f"The mitocarta files in \'{mitocarta_settings['mitocarta_reference_directory']}\' have been refreshed.")
+    return True
+
+def get_mitocarta_snapshot_path(reference_directory, mitocarta_link, sheet_name):
+    """
+    Each mitocarta file (version) and sheet gets its own snapshot file.
+    input:
+    reference_directory = string
+    mitocarta_link = string
+    sheet_name = string
+    output:
+    snapshot_path = string
+    """
+    file_name = os.path.splitext(os.path.basename(urllib.parse.urlparse(mitocarta_link).path))[0]
+    link_hash = hashlib.sha1(f"{mitocarta_link}|{sheet_name}".encode("utf-8")).hexdigest()[:10]
+    return os.path.join(reference_directory, f"{file_name}_{link_hash}.parquet")
+
 def filter_dataframe_columns(gui_object, protein_groups_dataframe, settings_dict):
     """
     input:
@@ -362,34 +706,32 @@ def filter_dataframe_rows(protein_groups_dataframe, settings_dict):
     filtered_groups_dataframe = pd.DataFrame, proteins not applying to the condition but should still be retained
     """
     logging.info("Start filtering out unwanted proteins and drop proteins containing NA values: ")
-    non_applying_rows, applying_rows = select_proteins(protein_groups_dataframe.index, settings_dict["PROTEIN_FILTERS"])
-    filtered_groups_dataframe = protein_groups_dataframe.loc[non_applying_rows]
-    protein_groups_dataframe = protein_groups_dataframe.loc[applying_rows]
+    filter_mask = get_protein_filter_mask(protein_groups_dataframe.index, settings_dict["PROTEIN_FILTERS"], settings_dict["PROTEIN_FILTER_MODE"])
+    filtered_groups_dataframe = protein_groups_dataframe[filter_mask]
+    protein_groups_dataframe = protein_groups_dataframe[~filter_mask]
 
     logging.info(f"Finished filtering out proteins not applying to the set protein_filters. "
                  f"The filtered dataframe has {len(protein_groups_dataframe)} rows and {len(protein_groups_dataframe.columns)} columns")
     return protein_groups_dataframe, filtered_groups_dataframe
 
-def select_proteins(row_labels_index, protein_filters):
+def get_protein_filter_mask(row_labels_index, protein_filters, protein_filter_mode):
     """
-    selects proteins to keep using index(should be Majority_proteins_id) and protein_filter, but keep proteins which do not apply to the filter.
+    Mark the proteins which apply to one of the protein filters. All filters are combined into one regular expression, so each row label is scanned once.
+    In the "contains" mode a row label applies whenever it contains a filter, in the "prefix" mode one of the semicolon separated protein IDs
+    of the row label should start with a filter, for example "REV__" or "CON__".
     input:
     row_labels_index = pd.DataFrame().index, the row labels(in this case 'Majority protein IDs') of the dataframe
-    protein_filters = list, list of filters 
+    protein_filters = list, list of filters
+    protein_filter_mode = string, "contains" or "prefix"
     output:
-    non_applying_proteins = list, list with rows not to keep
-    applying_proteins = list, list of rows to keep
+    filter_mask = np.array, boolean per row, True == the protein applies to a filter and should not be kept
     """
-    non_applying_proteins = []
-    applying_proteins = []
-    for row_label in row_labels_index:
-        for protein_filter in protein_filters:
-            if protein_filter in row_label and not row_label in non_applying_proteins:
-                non_applying_proteins.append(row_label)
-        if not row_label in non_applying_proteins:
-            applying_proteins.append(row_label)
-
-    return non_applying_proteins, applying_proteins
+    if len(protein_filters) == 0:
+        return np.zeros(len(row_labels_index), dtype=bool)
+    filter_pattern = "|".join(re.escape(protein_filter) for protein_filter in protein_filters)
+    if "prefix" == protein_filter_mode:
+        filter_pattern = f"(?:^|;)(?:{filter_pattern})"
+    return np.asarray(row_labels_index.astype(str).str.contains(filter_pattern, regex=True), dtype=bool)
 
 def fetch_identifiers(protein_groups_dataframe):
     """
@@ -438,32 +780,365 @@ def fetch_uniprot_annotation(gui_object, identifiers, settings_dict):
     identifiers = pd.Series
     settings_dict = dict["uniprot_step"], dictionary containing information about the uniprot user definable parameters.
     output:
-    protein_data_list = list, list of protein_data_dict
+    protein_data_dict = dict{identifier : dict}
+    failed_batch_amount = int, the amount of batches that could not be fetched completely from uniprot
     """
-    gui_object.report_status("Step 2, fetching data from uniprot. The data is fetched from uniprot in batches, after each batch {sleep_time} seconds pass\n"
-                             "before a new batch is queried to uniprot. This feature is implement to prevent being blacklisted".format(sleep_time=settings_dict["request_idle_time"]))
+    gui_object.report_status("Step 2, fetching data from uniprot. The data is fetched from uniprot in batches, at most {requests_per_second} requests per second are sent\n"
+                             "to uniprot. This feature is implement to prevent being blacklisted".format(requests_per_second=settings_dict["requests_per_second"]))
     protein_data_dict = {}
     function_dict = construct_function_dict(settings_dict)
-
-    #split identifiers into multiple sub arrays of length batch_length:
-    identifier_batches = np.split(identifiers, range(settings_dict["batch_amount"],len(identifiers), settings_dict["batch_amount"]))
-    for n_batch, identifiers_batch in enumerate(identifier_batches):
-        gui_object.report_status(f"Start fetching uniprot data for batch number {n_batch + 1} of the total {len(identifier_batches)} batches")
-        requestURL = settings_dict["uniprot_base_url"]+settings_dict["uniprot_request_url"]+",".join(identifiers_batch)
-        request = requests.get(requestURL, headers={"Accept" : "application/json"})
-        if request.ok == False:
-            gui_object.report_error(f"Something went wrong with batch {n_batch} of {len(identifier_batches)} batches while querying the uniprot database. The {len(identifiers_batch)} proteins of this batch will be ignored")
-            for identifier in identifiers_batch:
-                protein_data_dict[identifier] = {"gene_name":np.nan, "protein_name":np.nan, "organism_name":np.nan, "hyperlink":np.nan, "cell_compartment":np.nan, "string_linkout":np.nan}
+    cache_connection = open_uniprot_cache(gui_object, settings_dict["uniprot_cache"])
+    options_key = get_uniprot_cache_options_key(settings_dict["uniprot_options"])
+    #missing and empty identifiers can't be queried, these proteins get no uniprot data
+    unique_identifiers = [identifier for identifier in dict.fromkeys(identifiers) if isinstance(identifier, str) and identifier.strip() != ""]
+    if len(unique_identifiers) < identifiers.nunique(dropna=False):
+        logging.warning(f"{identifiers.nunique(dropna=False) - len(unique_identifiers)} missing or empty identifiers are not queried to uniprot")
+    if cache_connection is not None:
+        protein_data_dict = get_cached_protein_data(cache_connection, unique_identifiers, options_key)
+    missing_identifiers = [identifier for identifier in unique_identifiers if not identifier in protein_data_dict]
+    gui_object.report_status(f"{len(unique_identifiers) - len(missing_identifiers)} of the {len(unique_identifiers)} proteins were found in the uniprot cache, "
+                             f"{len(missing_identifiers)} proteins will be queried to uniprot")
+    if cache_connection is not None:
+        previously_failed_identifiers = get_previously_failed_identifiers(cache_connection, missing_identifiers, options_key)
+        if len(previously_failed_identifiers) > 0:
+            gui_object.report_status(f"{len(previously_failed_identifiers)} proteins could not be fetched from uniprot during a previous run and will be queried again")
+
+    #split the identifiers missing from the cache into multiple sub lists of length batch_amount:
+    identifier_batches = [missing_identifiers[start:start + settings_dict["batch_amount"]] for start in range(0, len(missing_identifiers), settings_dict["batch_amount"])]
+    rate_limiter = RateLimiter(settings_dict["requests_per_second"])
+    #one pooled session is shared by all threads, so connections to uniprot are reused between batches
+    session = requests.Session()
+    http_adapter = HTTPAdapter(pool_connections=2, pool_maxsize=settings_dict["max_concurrent_requests"])
+    session.mount("https://", http_adapter)
+    session.mount("http://", http_adapter)
+    executor = ThreadPoolExecutor(max_workers=settings_dict["max_concurrent_requests"])
+    failed_batches = []
+    try:
+        batch_futures = {executor.submit(fetch_uniprot_batch, session, rate_limiter, identifiers_batch, settings_dict): identifiers_batch
+                         for identifiers_batch in identifier_batches}
+        pending_futures = set(batch_futures)
+        n_batch = -1
+        while len(pending_futures) > 0:
+            #the cancel button is checked every second, also while a slow batch is running
+            finished_futures, pending_futures = wait(pending_futures, timeout=1, return_when=FIRST_COMPLETED)
+            if gui_object.is_cancel_requested() == True:
+                gui_object.report_status("Cancelling, the running uniprot requests are stopped")
+                break
+            for batch_future in finished_futures:
+                n_batch += 1
+                identifiers_batch = batch_futures[batch_future]
+                try:
+                    uniprot_output_list, string_linkout_dict, failure_reason = batch_future.result()
+                except Exception as error:
+                    logging.exception(f"An unexpected error occurred while fetching batch {n_batch + 1} from uniprot")
+                    uniprot_output_list, string_linkout_dict, failure_reason = None, None, f"unexpected error: {error}"
+                if uniprot_output_list is None:
+                    gui_object.report_error(f"Something went wrong with batch {n_batch + 1} of {len(identifier_batches)} batches while querying the uniprot database ({failure_reason}).\n"
+                                            f"The {len(identifiers_batch)} proteins of this batch will be ignored")
+                    for identifier in identifiers_batch:
+                        protein_data_dict[identifier] = {"gene_name":np.nan, "protein_name":np.nan, "organism_name":np.nan, "hyperlink":np.nan, "cell_compartment":np.nan, "string_linkout":np.nan}
+                else:
+                    protein_data_dict = update_protein_data_dict(gui_object, uniprot_output_list, identifiers_batch, function_dict, protein_data_dict, settings_dict)
+                    protein_data_dict = add_uniprot_hyperlink(protein_data_dict, settings_dict, identifiers_batch)
+                    protein_data_dict = add_string_linkout(protein_data_dict, settings_dict, identifiers_batch, string_linkout_dict)
+                    #a partially failed batch is not cached, so it is queried again during the next run
+                    if cache_connection is not None and failure_reason is None:
+                        store_protein_data_in_cache(cache_connection, protein_data_dict, identifiers_batch, options_key)
+                    logging.info(f"Succesfully fetched and saved data from uniprot for batch {n_batch + 1}:")
+                if failure_reason is not None:
+                    logging.error(f"Failed batch ({failure_reason}): {','.join(identifiers_batch)}")
+                    failed_batches.append(identifiers_batch)
+                    if cache_connection is not None:
+                        record_failed_batch(cache_connection, identifiers_batch, options_key, failure_reason)
+                gui_object.report_status(f"Finished fetching uniprot data for batch number {n_batch + 1} of the total {len(identifier_batches)} batches")
+    finally:
+        #the batches that are not started yet are dropped and waiting requests stop at once, the running requests end within their timeout
+        #and are not waited for, so cancelling doesn't wait for uniprot
+        rate_limiter.stop()
+        executor.shutdown(wait=False, cancel_futures=True)
+        session.close()
+    if len(failed_batches) > 0:
+        if cache_connection is not None:
+            gui_object.report_status(f"{len(failed_batches)} of the {len(identifier_batches)} batches could not be fetched completely from uniprot.\n"
+                                     f"Running the program again only queries the proteins of these batches.")
         else:
-            protein_data_dict = update_protein_data_dict(gui_object, request.json(), identifiers_batch, function_dict, protein_data_dict, settings_dict)
-            protein_data_dict = add_uniprot_hyperlink(protein_data_dict, settings_dict, identifiers_batch)
-            protein_data_dict = add_string_linkout(protein_data_dict, settings_dict, identifiers_batch)
-            logging.info(f"Succesfully fetched and saved data from uniprot for batch {n_batch + 1}:")
-        time.sleep(settings_dict["request_idle_time"])
+            gui_object.report_status(f"{len(failed_batches)} of the {len(identifier_batches)} batches could not be fetched completely from uniprot.\n"
+                                     f"Enable the uniprot cache to only query the proteins of these batches during a next run.")
+    if cache_connection is not None:
+        cache_connection.close()
     gui_object.report_status("Step 2, fetching data from uniprot, is finished.")
+    return protein_data_dict, len(failed_batches)
+
+class RateLimiter:
+    """
+    Token bucket shared by the threads querying uniprot, at most requests_per_second requests are started per second.
+    """
+    def __init__(self, requests_per_second):
+        """
+        input:
+        requests_per_second = int or float
+        output:
+        None
+        """
+        self.requests_per_second = requests_per_second
+        self.tokens = 1.0
+        self.last_refill_time = time.monotonic()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        """
+        Stop all waiting threads, every later acquire raises a requests.RequestException.
+        input:
+        None
+        output:
+        None
+        """
+        self.stop_event.set()
+
+    def wait(self, waiting_time):
+        """
+        Sleep for waiting_time seconds, or shorter whenever the rate limiter is stopped.
+        input:
+        waiting_time = float
+        output:
+        None
+        """
+        self.stop_event.wait(waiting_time)
+
+    def acquire(self):
+        """
+        Wait until a token is available and consume it.
+        input:
+        None
+        output:
+        None
+        """
+        while True:
+            if self.stop_event.is_set():
+                raise requests.RequestException("the uniprot requests have been cancelled")
+            with self.lock:
+                current_time = time.monotonic()
+                self.tokens = min(1.0, self.tokens + (current_time - self.last_refill_time) * self.requests_per_second)
+                self.last_refill_time = current_time
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                waiting_time = (1.0 - self.tokens) / self.requests_per_second
+            self.wait(waiting_time)
+
+def fetch_uniprot_batch(session, rate_limiter, identifiers_batch, settings_dict):
+    """
+    Query uniprot, and whenever requested the uniprot mapping service, for a single batch. This function is executed in a worker thread.
+    input:
+    session = requests.Session
+    rate_limiter = RateLimiter
+    identifiers_batch = list, list of uniprot identifiers
+    settings_dict = dict["uniprot_step"], dictionary containing information about the uniprot user definable parameters.
+    output:
+    uniprot_output_list = list, list of uniprot entries, None whenever the request failed
+    string_linkout_dict = dict{identifier : string_linkout}, None whenever the string linkout is not requested or failed
+    failure_reason = string, None whenever all requests of the batch succeeded
+    """
+    requestURL = settings_dict["uniprot_base_url"]+settings_dict["uniprot_request_url"]+",".join(identifiers_batch)
+    try:
+        request = send_request_with_retries(session, rate_limiter, settings_dict["retry_settings"], "GET", requestURL, headers={"Accept" : "application/json"})
+    except requests.RequestException as request_exception:
+        return None, None, f"connection error: {request_exception}"
+    if request.ok == False:
+        return None, None, f"uniprot responded with status code {request.status_code}"
+    try:
+        uniprot_output_list = request.json()
+    except ValueError as value_error:
+        return None, None, f"uniprot responded with invalid json: {value_error}"
+    string_linkout_dict, failure_reason = None, None
+    if settings_dict["uniprot_options"]["get_string_linkout"] == True:
+        try:
+            string_linkout_dict = get_string_linkout(session, rate_limiter, settings_dict["retry_settings"], identifiers_batch, settings_dict["string_linkout_parameters"])
+        except requests.RequestException as request_exception:
+            failure_reason = f"the uniprot mapping service failed: {request_exception}"
+    return uniprot_output_list, string_linkout_dict, failure_reason
+
+def send_request_with_retries(session, rate_limiter, retry_settings, method, url, **request_arguments):
+    """
+    Send a request and retry it with exponential backoff whenever the connection fails or the server is busy (HTTP 429 or 5xx).
+    Whenever the server sends a Retry-After header, the program waits as long as the server asks.
+    Every attempt gives up after the connect and read timeouts of retry_settings, so a stalled connection counts as a failed attempt.
+    input:
+    session = requests.Session
+    rate_limiter = RateLimiter
+    retry_settings = dict{"max_retries":int, "retry_backoff_seconds":int, "timeout":{"connect_seconds":int, "read_seconds":int}}
+    method = string, "GET" or "POST"
+    url = string
+    request_arguments = keyword arguments passed on to session.request
+    output:
+    response = requests.Response, the response of the last attempt
+    """
+    request_timeout = (retry_settings["timeout"]["connect_seconds"], retry_settings["timeout"]["read_seconds"])
+    for attempt in range(retry_settings["max_retries"] + 1):
+        rate_limiter.acquire()
+        try:
+            response = session.request(method, url, timeout=request_timeout, **request_arguments)
+            NETWORK_STATISTICS.add_request(response)
+        except requests.RequestException as request_exception:
+            NETWORK_STATISTICS.add_request(None)
+            if attempt == retry_settings["max_retries"]:
+                raise
+            waiting_time = retry_settings["retry_backoff_seconds"] * 2 ** attempt
+            logging.warning(f"Attempt {attempt + 1} to reach {url.split('?')[0]} failed ({request_exception}), retrying in {waiting_time} seconds")
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or attempt == retry_settings["max_retries"]:
+                return response
+            waiting_time = get_retry_after_time(response)
+            if waiting_time is None:
+                waiting_time = retry_settings["retry_backoff_seconds"] * 2 ** attempt
+            logging.warning(f"Attempt {attempt + 1} to reach {url.split('?')[0]} returned status code {response.status_code}, retrying in {waiting_time} seconds")
+        rate_limiter.wait(waiting_time)
+
+def get_retry_after_time(response):
+    """
+    The Retry-After header is either a number of seconds or a HTTP date.
+    input:
+    response = requests.Response
+    output:
+    waiting_time = float, None whenever the header is absent or invalid
+    """
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is None:
+        return None
+    if retry_after.strip().isdigit():
+        return float(retry_after)
+    try:
+        retry_after_date = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_after_date.timestamp() - time.time())
+
+def open_uniprot_cache(gui_object, cache_settings):
+    """
+    Open (or create) the on-disk cache with previously fetched uniprot annotation and evict the expired entries.
+    input:
+    gui_object = PyQt5, Qapplication
+    cache_settings = dict["uniprot_step"]["uniprot_cache"], dictionary with the user defined cache parameters
+    output:
+    cache_connection = sqlite3.Connection, None whenever the cache is disabled or could not be opened
+    """
+    if cache_settings["use_cache"] == False:
+        logging.info("The uniprot cache is disabled, all proteins will be queried to uniprot")
+        return None
+    try:
+        cache_connection = sqlite3.connect(cache_settings["cache_file_path"], timeout=30)
+        cache_connection.execute("CREATE TABLE IF NOT EXISTS uniprot_annotation (accession TEXT NOT NULL, options_key TEXT NOT NULL, "
+                                 "protein_data TEXT NOT NULL, fetched_at REAL NOT NULL, PRIMARY KEY (accession, options_key))")
+        cache_connection.execute("CREATE TABLE IF NOT EXISTS failed_proteins (accession TEXT NOT NULL, options_key TEXT NOT NULL, "
+                                 "failure_reason TEXT NOT NULL, failed_at REAL NOT NULL, PRIMARY KEY (accession, options_key))")
+        evict_uniprot_cache_entries(cache_connection, cache_settings["cache_expiration_days"], cache_settings["cache_max_entries"])
+    except sqlite3.Error as sqlite_error:
+        log_error(gui_object, f"The uniprot cache \'{cache_settings['cache_file_path']}\' could not be opened, all proteins will be queried to uniprot.", sqlite_error)
+        return None
+    return cache_connection
+
+def evict_uniprot_cache_entries(cache_connection, cache_expiration_days, cache_max_entries):
+    """
+    Remove entries older than cache_expiration_days and, whenever the cache holds more than cache_max_entries entries, the oldest entries.
+    A value of 0 disables the corresponding eviction rule.
+    input:
+    cache_connection = sqlite3.Connection
+    cache_expiration_days = int
+    cache_max_entries = int
+    output:
+    None
+    """
+    if cache_expiration_days > 0:
+        expiration_time = time.time() - cache_expiration_days * 24 * 60 * 60
+        cache_connection.execute("DELETE FROM uniprot_annotation WHERE fetched_at < ?", (expiration_time,))
+        cache_connection.execute("DELETE FROM failed_proteins WHERE failed_at < ?", (expiration_time,))
+    if cache_max_entries > 0:
+        cache_connection.execute("DELETE FROM uniprot_annotation WHERE rowid NOT IN "
+                                 "(SELECT rowid FROM uniprot_annotation ORDER BY fetched_at DESC LIMIT ?)", (cache_max_entries,))
+    cache_connection.commit()
+
+def get_uniprot_cache_options_key(uniprot_options):
+    """
+    Cached annotation is only valid for the same set of requested uniprot fields, the enabled options are therefore part of the cache key.
+    input:
+    uniprot_options = dict{"option":boolean}
+    output:
+    options_key = string
+    """
+    enabled_options = sorted(option for option, option_value in uniprot_options.items() if option_value == True)
+    return f"v{UNIPROT_CACHE_VERSION}:" + ",".join(enabled_options)
+
+def get_cached_protein_data(cache_connection, identifiers, options_key):
+    """
+    input:
+    cache_connection = sqlite3.Connection
+    identifiers = list, list of uniprot identifiers
+    options_key = string
+    output:
+    protein_data_dict = dict{identifier : {gene_name, protein_name, organism_name, cell_comparment, uniprot_hyperlink, string_linkout}}, only the cached identifiers
+    """
+    protein_data_dict = {}
+    #sqlite limits the amount of parameters per query, so the identifiers are looked up in chunks:
+    for start in range(0, len(identifiers), UNIPROT_CACHE_QUERY_SIZE):
+        identifiers_chunk = identifiers[start:start + UNIPROT_CACHE_QUERY_SIZE]
+        placeholders = ",".join("?" * len(identifiers_chunk))
+        cached_rows = cache_connection.execute(f"SELECT accession, protein_data FROM uniprot_annotation WHERE options_key = ? AND accession IN ({placeholders})",
+                                               [options_key] + identifiers_chunk)
+        for accession, protein_data in cached_rows:
+            protein_data_dict[accession] = json.loads(protein_data)
     return protein_data_dict
 
+def store_protein_data_in_cache(cache_connection, protein_data_dict, identifiers, options_key):
+    """
+    input:
+    cache_connection = sqlite3.Connection
+    protein_data_dict = dict{identifier : {gene_name, protein_name, organism_name, cell_comparment, uniprot_hyperlink, string_linkout}}
+    identifiers = list, list of uniprot identifiers which should be stored
+    options_key = string
+    output:
+    None
+    """
+    fetched_at = time.time()
+    cache_connection.executemany("INSERT OR REPLACE INTO uniprot_annotation (accession, options_key, protein_data, fetched_at) VALUES (?, ?, ?, ?)",
+                                 [(identifier, options_key, json.dumps(protein_data_dict[identifier]), fetched_at) for identifier in identifiers])
+    cache_connection.executemany("DELETE FROM failed_proteins WHERE accession = ? AND options_key = ?", [(identifier, options_key) for identifier in identifiers])
+    cache_connection.commit()
+
+def record_failed_batch(cache_connection, identifiers, options_key, failure_reason):
+    """
+    Remember the proteins of a batch which could not be fetched, a next run queries these proteins again.
+    input:
+    cache_connection = sqlite3.Connection
+    identifiers = list, list of uniprot identifiers
+    options_key = string
+    failure_reason = string
+    output:
+    None
+    """
+    failed_at = time.time()
+    cache_connection.executemany("INSERT OR REPLACE INTO failed_proteins (accession, options_key, failure_reason, failed_at) VALUES (?, ?, ?, ?)",
+                                 [(identifier, options_key, failure_reason, failed_at) for identifier in identifiers])
+    cache_connection.commit()
+
+def get_previously_failed_identifiers(cache_connection, identifiers, options_key):
+    """
+    input:
+    cache_connection = sqlite3.Connection
+    identifiers = list, list of uniprot identifiers
+    options_key = string
+    output:
+    failed_identifiers = list, identifiers which could not be fetched during a previous run
+    """
+    failed_identifiers = []
+    for start in range(0, len(identifiers), UNIPROT_CACHE_QUERY_SIZE):
+        identifiers_chunk = identifiers[start:start + UNIPROT_CACHE_QUERY_SIZE]
+        placeholders = ",".join("?" * len(identifiers_chunk))
+        failed_rows = cache_connection.execute(f"SELECT accession FROM failed_proteins WHERE options_key = ? AND accession IN ({placeholders})",
+                                               [options_key] + identifiers_chunk)
+        failed_identifiers.extend(accession for accession, in failed_rows)
+    return failed_identifiers
+
 def construct_function_dict(settings_dict):
     """
     Based on the user input apply which functions should be used.
@@ -495,8 +1170,9 @@ def update_protein_data_dict(gui_object, uniprot_output_list, identifiers, funct
     output:
     protein_data_dict = dict{protein : {gene_name, protein_name, organism_name, cell_comparment}}
     """
+    uniprot_output_index = index_uniprot_output(uniprot_output_list)
     for identifier in identifiers:
-        uniprot_data_dict = get_matching_uniprot_query(uniprot_output_list, identifier)
+        uniprot_data_dict = get_matching_uniprot_query(uniprot_output_index, identifier)
         if not identifier in protein_data_dict.keys():
             protein_data_dict[identifier] = {}
         for function_name, function in function_dict.items():
@@ -516,19 +1192,40 @@ def update_protein_data_dict(gui_object, uniprot_output_list, identifiers, funct
                     protein_data_dict[identifier].update({function_name : np.nan})
     return protein_data_dict
 
-def get_matching_uniprot_query(uniprot_output_list, identifier):
+def index_uniprot_output(uniprot_output_list):
     """
-    Per batch not all proteins are found. This function returns the uniprot data for the given identifier if it is present in the uniprot output.
+    Index the uniprot output of a batch once by accession, so each identifier is looked up in constant time.
+    Secondary accessions are indexed as well, but a primary accession always takes precedence.
     input:
     uniprot_output_list = list, list of uniprot entries
-    identifier = string
     output:
-    uniprot_data_dict
+    uniprot_output_index = dict{accession : uniprot_data_dict}
     """
+    uniprot_output_index = {}
+    for uniprot_data_dict in uniprot_output_list:
+        if "secondaryAccession" in uniprot_data_dict:
+            for secondary_accession in uniprot_data_dict["secondaryAccession"]:
+                uniprot_output_index.setdefault(secondary_accession, uniprot_data_dict)
     for uniprot_data_dict in uniprot_output_list:
         if "accession" in uniprot_data_dict:
-            if uniprot_data_dict["accession"] == identifier:
-                return uniprot_data_dict
+            uniprot_output_index[uniprot_data_dict["accession"]] = uniprot_data_dict
+    return uniprot_output_index
+
+def get_matching_uniprot_query(uniprot_output_index, identifier):
+    """
+    Per batch not all proteins are found. This function returns the uniprot data for the given identifier if it is present in the uniprot output.
+    Isoforms (for example "P12345-2") which are not in the output themselves get the data of the canonical protein.
+    input:
+    uniprot_output_index = dict{accession : uniprot_data_dict}, the output of index_uniprot_output
+    identifier = string
+    output:
+    uniprot_data_dict, None whenever the identifier is not present in the uniprot output
+    """
+    if identifier in uniprot_output_index:
+        return uniprot_output_index[identifier]
+    canonical_identifier = ISOFORM_SUFFIX_PATTERN.sub("", identifier)
+    if canonical_identifier in uniprot_output_index:
+        return uniprot_output_index[canonical_identifier]
     return None
 
 def add_uniprot_hyperlink(protein_data_dict, settings_dict, identifiers):
@@ -542,22 +1239,25 @@ def add_uniprot_hyperlink(protein_data_dict, settings_dict, identifiers):
     """
     if settings_dict["uniprot_options"]["get_uniprot_hyperlink"] == True:
         for identifier in identifiers:
-            protein_data_dict[identifier].update({"uniprot_hyperlink":make_hyperlink(settings_dict["uniprot_protein_base_url"]+identifier)})
+            protein_data_dict[identifier].update({"uniprot_hyperlink":settings_dict["uniprot_protein_base_url"]+identifier})
     return protein_data_dict
 
-def add_string_linkout(protein_data_dict, settings_dict, identifiers):
+def add_string_linkout(protein_data_dict, settings_dict, identifiers, string_linkout_dict):
     """
     input:
     protein_data_dict = dict{identifier : {gene_name, protein_name, organism_name, cell_comparment, uniprot_hyperlink}}
     settings_dict = dict, dictionary containing settings
     identifiers = list, list of strings
+    string_linkout_dict = dict{identifier : string_linkout}, the output of get_string_linkout
     output:
     protein_data_dict = dict{identifier : {gene_name, protein_name, organism_name, cell_comparment, uniprot_hyperlink, string_linkout}}
     """
     if settings_dict["uniprot_options"]["get_string_linkout"] == True:
-        string_linkout_dict = get_string_linkout(identifiers, settings_dict["string_linkout_parameters"])
         for identifier in identifiers:
-            protein_data_dict[identifier].update({"string_linkout":string_linkout_dict[identifier]})
+            if string_linkout_dict is None:
+                protein_data_dict[identifier].update({"string_linkout":np.nan})
+            else:
+                protein_data_dict[identifier].update({"string_linkout":string_linkout_dict[identifier]})
     return protein_data_dict
 
 def get_uniprot_gene_name(uniprot_data_dict, settings_dict):
@@ -665,10 +1365,13 @@ def get_database_reference_element(uniprot_data_dict, reference_type):
     else:
         return np.nan
 
-def get_string_linkout(identifiers, settings_dict):
+def get_string_linkout(session, rate_limiter, retry_settings, identifiers, settings_dict):
     """
     Use the uniprot identifier mapping service to get a linkout to the string database per uniprot identifier.
     input:
+    session = requests.Session
+    rate_limiter = RateLimiter
+    retry_settings = dict{"max_retries":int, "retry_backoff_seconds":int, "timeout":{"connect_seconds":int, "read_seconds":int}}
     identifiers = list, list of uniprot identifiers
     settings_dict = dict, dictionary with the specific parameters for the string linkout. 
     output:
@@ -679,17 +1382,14 @@ def get_string_linkout(identifiers, settings_dict):
     formatted_identifier_string = process_uniprot_identifier_input(identifiers, settings_dict["regex_pattern"])
     parameters = {'from': 'ACC+ID', 'to': 'STRING_ID', 'format': 'tab', 'query': formatted_identifier_string}
 
-    data = urllib.parse.urlencode(parameters)
-    data = data.encode('utf-8')
-    request = urllib.request.Request(settings_dict["uniprot_mapping_service_url"], data)
-    with urllib.request.urlopen(request) as uniprot_mapping_request:
-       response = uniprot_mapping_request.read()
-    uniprot_mapped_proteins_dict = process_uniprot_mapping_service_output(response.decode('utf-8'))
+    uniprot_mapping_request = send_request_with_retries(session, rate_limiter, retry_settings, "POST", settings_dict["uniprot_mapping_service_url"], data=parameters)
+    uniprot_mapping_request.raise_for_status()
+    uniprot_mapped_proteins_dict = process_uniprot_mapping_service_output(uniprot_mapping_request.text)
     for identifier in identifiers:
         if not identifier in uniprot_mapped_proteins_dict.keys():
             string_linkout_dict[identifier] = np.nan
         else:
-            string_linkout_dict[identifier] = make_hyperlink(settings_dict["string_base_url"]+uniprot_mapped_proteins_dict[identifier])
+            string_linkout_dict[identifier] = settings_dict["string_base_url"]+uniprot_mapped_proteins_dict[identifier]
     return string_linkout_dict
 
 def process_uniprot_identifier_input(identifiers, regex_pattern):
@@ -738,6 +1438,10 @@ def append_uniprot_data_to_dataframe(protein_groups_dataframe, protein_data_dict
 
     for uniprot_column_name in uniprot_column_names:
         uniprot_column_values = get_uniprot_column_values(protein_groups_dataframe["identifier"], uniprot_column_name, protein_data_dict)
+        #most proteins share a handful of organisms and compartments, which are stored once as categories.
+        #a column without any value stays a float column, as the categories of an empty categorical column don't survive a parquet checkpoint
+        if uniprot_column_name in CATEGORICAL_UNIPROT_COLUMNS and pd.notna(uniprot_column_values).any():
+            uniprot_column_values = pd.Categorical(uniprot_column_values)
         protein_groups_dataframe[uniprot_column_name] = uniprot_column_values
 
     logging.info("Finished adding the uniprot columns to the existing dataframe")
@@ -777,7 +1481,8 @@ def get_uniprot_column_values(identifiers, uniprot_column_name, protein_data_dic
     """
     uniprot_column_values = []
     for identifier in identifiers:
-        if uniprot_column_name in protein_data_dict[identifier]:
+        #missing and empty identifiers are not queried and have no entry in protein_data_dict
+        if uniprot_column_name in protein_data_dict.get(identifier, {}):
             uniprot_column_value = protein_data_dict[identifier][uniprot_column_name]
             uniprot_column_values.append(uniprot_column_value)
         else:
@@ -804,26 +1509,17 @@ def is_protein_in_mitocarta(gui_object, protein_groups_dataframe, mitocarta_spec
     new_column_name = string
     symbol_column = string, initial column to evaluate whether proteins are also found in the mitocarta data
     additional_symbol_column = string, secondary column which should contain multiple symbols for the same gene.
+    use_symbol_column = boolean
+    use_additional_symbol_column = boolean
     output:
     protein_groups_dataframe = pd.DataFrame()
     """
     gui_object.report_status(f"Start elucidating which proteins are present in the {species_name} mitocarta dataset")
-    mitocarta_species_dataframe[additional_symbol_column].fillna('', inplace=True)
-    replace_non_string_elements_in_mitocarta_column(additional_symbol_column, mitocarta_species_dataframe)
     try:
-        if use_symbol_column == True and use_additional_symbol_column == True:
-            symbol_rows = protein_groups_dataframe["gene_name"].isin([symbol for symbol in protein_groups_dataframe["gene_name"] if
-                                                                  mitocarta_species_dataframe[symbol_column].str.contains(symbol, regex=False).any() or
-                                                                  mitocarta_species_dataframe[additional_symbol_column].str.contains(symbol, regex=False).any()])
-        elif use_symbol_column == True and use_additional_symbol_column == False:
-            symbol_rows = protein_groups_dataframe["gene_name"].isin(symbol for symbol in protein_groups_dataframe["gene_name"] if
-                                                                  mitocarta_species_dataframe[symbol_column].str.contains(symbol, regex=False).any())
-        elif use_symbol_column == False and use_additional_symbol_column == True:
-            symbol_rows = protein_groups_dataframe["gene_name"].isin(symbol for symbol in protein_groups_dataframe["gene_name"] if
-                                                                  mitocarta_species_dataframe[additional_symbol_column].str.contains(symbol, regex=False).any())
-
-        presency_index = protein_groups_dataframe.index[symbol_rows]
-        protein_groups_dataframe[new_column_name] = [1.0 if index in presency_index else 0.0 for index in range(protein_groups_dataframe.shape[0])]
+        mitocarta_symbol_index = build_mitocarta_symbol_index(mitocarta_species_dataframe, symbol_column, additional_symbol_column,
+                                                              use_symbol_column, use_additional_symbol_column)
+        symbol_rows = protein_groups_dataframe["gene_name"].isin(mitocarta_symbol_index)
+        protein_groups_dataframe[new_column_name] = np.where(symbol_rows, 1.0, 0.0)
     except IndexError as index_error:
         log_error(gui_object, f"An index error occurred while evaluating whether proteins are found in {species_name} mitocarta data set. The mitocarta step will be ignored.", index_error)
     except ValueError as value_error:
@@ -834,46 +1530,56 @@ def is_protein_in_mitocarta(gui_object, protein_groups_dataframe, mitocarta_spec
     return protein_groups_dataframe
 
 
-def replace_non_string_elements_in_mitocarta_column(additional_symbol_column, mitocarta_species_dataframe):
+def build_mitocarta_symbol_index(mitocarta_species_dataframe, symbol_column, additional_symbol_column, use_symbol_column, use_additional_symbol_column):
     """
-    In the mitocarta_mouse_data there are several synonyms which are not string, in order to remove these I wrote the  following line of code:
+    Collect the gene symbols of the mitocarta dataset in a set, so each gene name is looked up in constant time and only matches a complete symbol.
+    The synonyms in the additional symbol column are separated by "|" and each synonym is added as a separate symbol.
+    In the mitocarta_mouse_data there are several synonyms which are not string, these are skipped.
     input:
-    additional_symbol_column = string
     mitocarta_species_dataframe = pd.Dataframe
+    symbol_column = string
+    additional_symbol_column = string
+    use_symbol_column = boolean
+    use_additional_symbol_column = boolean
     output:
-    None
+    mitocarta_symbol_index = set, set of gene symbols
     """
-    mitocarta_species_dataframe[additional_symbol_column].where(cond=[True if type(x) == str else False for x in
-                                                                      mitocarta_species_dataframe[
-                                                                          additional_symbol_column].str.split("|")],
-                                                                other="-", inplace=True)
+    mitocarta_symbol_index = set()
+    if use_symbol_column == True:
+        mitocarta_symbol_index.update(symbol.strip() for symbol in mitocarta_species_dataframe[symbol_column] if isinstance(symbol, str))
+    if use_additional_symbol_column == True:
+        for synonyms in mitocarta_species_dataframe[additional_symbol_column]:
+            if isinstance(synonyms, str):
+                mitocarta_symbol_index.update(synonym.strip() for synonym in synonyms.split("|"))
+    #empty symbols and the "-" placeholder for genes without synonyms are not gene symbols:
+    mitocarta_symbol_index.difference_update({"", "-"})
+    return mitocarta_symbol_index
 
 
-def cluster_reorder(gui_object, sample_specific_dataframe, method = 'average', metric = 'correlation'):
+def cluster_reorder(gui_object, sample_specific_dataframe, method = 'average', metric = 'correlation', memory_budget_mb = 4096, optimal_leaf_ordering = False):
     """
     The complexome profiling data is transformed to a condensed distance matrix and the proteins are clustered using hierarchical clustering. 
-    The optimal order is determined resulting in minimal distance between adjacent leaves. 
+    By default the proteins are ordered as the leaves of the dendrogram. Whenever optimal_leaf_ordering is enabled, the order of the leaves is
+    optimised resulting in minimal distance between adjacent leaves, which gives a smoother heatmap but takes much longer for large samples.
+    For the methods in VECTOR_LINKAGE_METHODS combined with the euclidean metric no distance matrix is needed, the observations are clustered directly with fastcluster.linkage_vector.
+    For the other methods the condensed distance matrix is filled in chunks, and clustering is skipped whenever it doesn't fit in memory_budget_mb.
     input:
     gui_object = PyQt5, Qapplication
-    sample_specific_dataframe = pd.DataFrame()
+    sample_specific_dataframe = pd.DataFrame() or np.array(), the fraction values of the sample, converted to float64 for the clustering
     method = string
     metric = string
+    memory_budget_mb = int, the maximum size of the condensed distance matrix in megabytes
+    optimal_leaf_ordering = boolean
     output:
     order = dict{protein_identifier : ordered_index}
     clustered = np.array(), encoded as linkage matrix 
     """
     try:
-        condensed_distance_matrix = spd.pdist(np.array(sample_specific_dataframe))
-        clustered = fastcluster.linkage(condensed_distance_matrix, method=method, metric=metric)
-
-        n = len(clustered) + 1
-        cache = dict()
-        for k in range(len(clustered)):
-            c1, c2 = int(clustered[k][0]), int(clustered[k][1])
-            c1 = [c1] if c1 < n else cache.pop(c1)
-            c2 = [c2] if c2 < n else cache.pop(c2)
-            cache[n + k] = c1 + c2
-        ordered_index = cache[2 * len(clustered)]
+        observations = np.asarray(sample_specific_dataframe, dtype="float64")
+        if is_clustering_within_memory_budget(gui_object, observations.shape[0], method, metric, memory_budget_mb, optimal_leaf_ordering) == False:
+            return {}, np.empty([0,0], dtype="float64")
+        ordered_index, clustered, clustering_times = compute_cluster_order(observations, method, metric, optimal_leaf_ordering)
+        gui_object.report_status(get_clustering_time_message(observations.shape[0], clustering_times))
 
         order = {label: index_x for index_x, label in enumerate(ordered_index)}
         return order, clustered
@@ -881,52 +1587,369 @@ def cluster_reorder(gui_object, sample_specific_dataframe, method = 'average', m
         log_error(gui_object, "An exception occured while applying clustering on a sample", error)
         return {}, np.empty([0,0], dtype="float64")
 
+def is_clustering_within_memory_budget(gui_object, protein_amount, method, metric, memory_budget_mb, optimal_leaf_ordering):
+    """
+    Report how much memory the clustering requires and whether this fits in the memory budget.
+    input:
+    gui_object = PyQt5, Qapplication
+    protein_amount = int
+    method = string
+    metric = string
+    memory_budget_mb = int, 0 means there is no memory budget
+    optimal_leaf_ordering = boolean
+    output:
+    boolean, True == the clustering fits in the memory budget and False == the clustering doesn't fit in the memory budget
+    """
+    required_memory_mb = estimate_clustering_memory_mb(protein_amount, method, metric, optimal_leaf_ordering)
+    if memory_budget_mb == 0:
+        gui_object.report_status(f"Clustering {protein_amount} proteins requires about {required_memory_mb:.0f} MB of memory (no memory budget)")
+        return True
+    gui_object.report_status(f"Clustering {protein_amount} proteins requires about {required_memory_mb:.0f} MB of memory (memory budget: {memory_budget_mb} MB)")
+    if required_memory_mb > memory_budget_mb:
+        gui_object.report_error(f"Clustering {protein_amount} proteins with method {method} requires about {required_memory_mb:.0f} MB, which is more than the memory budget of {memory_budget_mb} MB.\n"
+                                f"Increase memory_budget_mb or use the euclidean metric with one of the methods {*VECTOR_LINKAGE_METHODS,} which don't need a distance matrix. The clustering will be skipped.")
+        return False
+    return True
+
+def compute_cluster_order(observations, method, metric, optimal_leaf_ordering):
+    """
+    Cluster the observations and return the order of the leaves of the dendrogram. This function doesn't report to the gui, so it can run in a worker process.
+    input:
+    observations = np.array(), 2D array with a row per protein
+    method = string
+    metric = string
+    optimal_leaf_ordering = boolean
+    output:
+    ordered_index = np.array(), the row positions of the proteins in the order of the dendrogram leaves
+    clustered = np.array(), encoded as linkage matrix
+    clustering_times = dict{"linkage_seconds":float, "leaf_ordering_seconds":float}
+    """
+    start_time = time.perf_counter()
+    if is_vector_linkage_possible(method, metric, optimal_leaf_ordering):
+        clustered = fastcluster.linkage_vector(observations, method=method, metric=metric)
+    else:
+        condensed_distance_matrix = compute_condensed_distance_matrix(observations, metric)
+        #the optimal leaf ordering needs the distance matrix after the linkage, so it may only be overwritten without optimal leaf ordering
+        clustered = fastcluster.linkage(condensed_distance_matrix, method=method, preserve_input=optimal_leaf_ordering)
+    linkage_time = time.perf_counter()
+    if optimal_leaf_ordering == True:
+        clustered = sch.optimal_leaf_ordering(clustered, condensed_distance_matrix)
+    #leaves_list walks the dendrogram from left to right in linear time
+    ordered_index = sch.leaves_list(clustered)
+    clustering_times = {"linkage_seconds": linkage_time - start_time, "leaf_ordering_seconds": time.perf_counter() - linkage_time}
+    return ordered_index, clustered, clustering_times
+
+def get_clustering_time_message(protein_amount, clustering_times):
+    """
+    input:
+    protein_amount = int
+    clustering_times = dict{"linkage_seconds":float, "leaf_ordering_seconds":float}
+    output:
+    clustering_time_message = string
+    """
+    return (f"Clustered {protein_amount} proteins in {clustering_times['linkage_seconds']:.1f} seconds, "
+            f"ordering the leaves took {clustering_times['leaf_ordering_seconds']:.1f} seconds")
+
+def cluster_shared_observations(shared_memory_name, matrix_shape, start_column, end_column, method, metric, optimal_leaf_ordering):
+    """
+    Executed in a worker process: cluster the columns start_column up to end_column of the fraction matrix in shared memory.
+    The matrix is not copied to the worker process, only the name of the shared memory block is sent.
+    input:
+    shared_memory_name = string
+    matrix_shape = tuple, (rows, columns) of the fraction matrix
+    start_column = int
+    end_column = int
+    method = string
+    metric = string
+    optimal_leaf_ordering = boolean
+    output:
+    ordered_index = np.array(), the row positions of the proteins in the order of the dendrogram leaves
+    clustering_times = dict{"linkage_seconds":float, "leaf_ordering_seconds":float}
+    """
+    shared_memory = SharedMemory(name=shared_memory_name)
+    try:
+        fraction_matrix = np.ndarray(matrix_shape, dtype=FRACTION_DTYPE, buffer=shared_memory.buf)
+        #only the columns of this job are converted to float64
+        ordered_index, clustered, clustering_times = compute_cluster_order(np.asarray(fraction_matrix[:, start_column:end_column], dtype="float64"),
+                                                                           method, metric, optimal_leaf_ordering)
+        del fraction_matrix
+    finally:
+        shared_memory.close()
+    return ordered_index, clustering_times
+
+def get_cluster_order_column(order_mapping, protein_amount):
+    """
+    Convert the order mapping of cluster_reorder to column values, the positions of the values correspond to the rows of the dataframe.
+    input:
+    order_mapping = dict{row_position : ordered_index}, an empty dict whenever the clustering failed
+    protein_amount = int
+    output:
+    order_column = np.array()
+    """
+    order_column = np.full(protein_amount, np.nan)
+    for row_position, ordered_index in order_mapping.items():
+        order_column[row_position] = ordered_index
+    return order_column
+
+def is_vector_linkage_possible(method, metric, optimal_leaf_ordering):
+    """
+    fastcluster.linkage_vector gives the same clustering as fastcluster.linkage for these methods, as long as the distances are euclidean.
+    The optimal leaf ordering always needs the distance matrix.
+    input:
+    method = string
+    metric = string
+    optimal_leaf_ordering = boolean
+    output:
+    boolean, True == the observations can be clustered without a distance matrix
+    """
+    return method in VECTOR_LINKAGE_METHODS and "euclidean" == metric and optimal_leaf_ordering == False
+
+def estimate_clustering_memory_mb(protein_amount, method, metric, optimal_leaf_ordering):
+    """
+    Estimate the memory needed to cluster protein_amount proteins, which is dominated by the condensed distance matrix of n*(n-1)/2 float64 values.
+    Methods clustered with fastcluster.linkage_vector only need memory linear in the amount of proteins.
+    With optimal leaf ordering fastcluster.linkage(preserve_input=True) clusters a copy of the distance matrix, so the matrix is counted twice.
+    The estimate is per clustering process, every process clusters its own sample.
+    input:
+    protein_amount = int
+    method = string
+    metric = string
+    optimal_leaf_ordering = boolean
+    output:
+    required_memory_mb = float
+    """
+    if is_vector_linkage_possible(method, metric, optimal_leaf_ordering):
+        #the linkage matrix and the working copy of the observations
+        return protein_amount * 8 * 8 / 1024 ** 2
+    distance_matrix_amount = 2 if optimal_leaf_ordering == True else 1
+    return distance_matrix_amount * protein_amount * (protein_amount - 1) / 2 * 8 / 1024 ** 2
+
+def compute_condensed_distance_matrix(observations, metric):
+    """
+    Compute the condensed distance matrix (same layout as spd.pdist) in blocks of rows, so besides the condensed matrix itself
+    only one block of at most DISTANCE_CHUNK_BYTES is kept in memory.
+    Correlation and cosine distances are computed as 1 - the matrix product of the row normalized observations, a single BLAS call per block.
+    input:
+    observations = np.array(), 2D array with a row per protein
+    metric = string
+    output:
+    condensed_distance_matrix = np.array(), 1D float64 array of length n*(n-1)/2
+    """
+    protein_amount = observations.shape[0]
+    condensed_distance_matrix = np.empty(protein_amount * (protein_amount - 1) // 2, dtype="float64")
+    chunk_rows = max(1, DISTANCE_CHUNK_BYTES // (8 * max(protein_amount, 1)))
+    if metric in ("correlation", "cosine"):
+        normalized_observations = normalize_observations(observations, metric)
+    else:
+        metric_arguments = get_global_metric_arguments(observations, metric)
+    for start_row in range(0, protein_amount - 1, chunk_rows):
+        end_row = min(start_row + chunk_rows, protein_amount - 1)
+        if metric in ("correlation", "cosine"):
+            distance_block = 1.0 - normalized_observations[start_row:end_row] @ normalized_observations[start_row:].T
+            np.clip(distance_block, 0.0, 2.0, out=distance_block)
+        else:
+            distance_block = spd.cdist(observations[start_row:end_row], observations[start_row:], metric=metric, **metric_arguments)
+        for row in range(start_row, end_row):
+            #the distances of row to the rows after it are stored consecutively in the condensed matrix
+            condensed_start = row * protein_amount - row * (row + 1) // 2
+            condensed_distance_matrix[condensed_start:condensed_start + protein_amount - row - 1] = distance_block[row - start_row, row - start_row + 1:]
+    return condensed_distance_matrix
+
+def normalize_observations(observations, metric):
+    """
+    Scale each row to unit length (after centering it for the correlation metric), so the dot product of two rows is their correlation or cosine similarity.
+    Rows without any variation, for example proteins which are absent in all fractions of a sample, have no defined correlation (spd.pdist returns NaN
+    which fastcluster can't cluster). These rows are set to zero, which puts them at distance 1 (uncorrelated) from all other proteins.
+    input:
+    observations = np.array(), 2D array with a row per protein
+    metric = string, "correlation" or "cosine"
+    output:
+    normalized_observations = np.array()
+    """
+    if "correlation" == metric:
+        normalized_observations = observations - observations.mean(axis=1, keepdims=True)
+    else:
+        normalized_observations = observations.copy()
+    row_norms = np.linalg.norm(normalized_observations, axis=1, keepdims=True)
+    np.divide(normalized_observations, row_norms, out=normalized_observations, where=row_norms > 0)
+    normalized_observations[row_norms[:, 0] == 0] = 0.0
+    return normalized_observations
+
+def get_global_metric_arguments(observations, metric):
+    """
+    The seuclidean and mahalanobis metrics use the variance of all observations, spd.cdist would only use the rows of one block.
+    input:
+    observations = np.array(), 2D array with a row per protein
+    metric = string
+    output:
+    metric_arguments = dict, keyword arguments for spd.cdist
+    """
+    if "seuclidean" == metric:
+        return {"V": np.var(observations, axis=0, ddof=1)}
+    if "mahalanobis" == metric:
+        return {"VI": np.linalg.inv(np.cov(observations.T)).T}
+    return {}
+
 def dump_data_to_excel(gui_object, protein_groups_dataframe, non_selected_dataframe, settings_dict):
     """
     The last part of this script, dump the complexome profiling data into an excel file.
+    The workbook is written in the constant_memory mode of xlsxwriter, every row is written to disk directly after it has been added,
+    so the memory use doesn't grow with the size of the workbook. In this mode the rows have to be written in order, therefore the
+    column widths and the conditional formatting are applied before the rows are written.
     input:
     gui_object = PyQt5, Qapplication
-    protein_groups_dataframe = pd.DataFrame()
-    non_selected_dataframe = pd.DataFrame(), proteins that have been filtered away in the analysis
+    protein_groups_dataframe = pd.DataFrame(), ordered by order_complexome_profiling_dataframe
+    non_selected_dataframe = pd.DataFrame(), proteins that have been filtered away in the analysis, ordered by order_complexome_profiling_dataframe
     settings_dict = dict, dictionary with parameters for this function
     output:
     None
     """
     gui_object.report_status("Step 5, start writing away the data to the excel file {file_name}".format(file_name=settings_dict["make_excel_file_step"]["excel_file_name"]))
     try:
-        writer = pd.ExcelWriter(settings_dict["make_excel_file_step"]["excel_file_name"], engine='xlsxwriter', mode="w")
-        workbook = writer.book
-
-        ordered_columns = get_ordered_sample_columns(protein_groups_dataframe)
-        protein_groups_dataframe = order_complexome_profiling_dataframe(protein_groups_dataframe, ordered_columns, settings_dict)
-        non_selected_dataframe = order_complexome_profiling_dataframe(non_selected_dataframe, [], settings_dict)
-
-        protein_groups_dataframe.to_excel(writer, sheet_name = 'data', index=False)
-        non_selected_dataframe.to_excel(writer, sheet_name = 'filtered away proteins', index=False)
-        worksheet = writer.sheets['data']
+        #only the HYPERLINK_COLUMNS are written as hyperlinks, other text is never converted to a link
+        workbook = xlsxwriter.Workbook(settings_dict["make_excel_file_step"]["excel_file_name"], {"constant_memory": True, "strings_to_urls": False})
+        header_format = workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+        hyperlink_format = workbook.add_format({"font_color": "blue", "underline": 1})
 
+        worksheet = workbook.add_worksheet('data')
         positions = get_sample_positions(protein_groups_dataframe.columns.tolist())
-        apply_conditional_formating_per_sample(protein_groups_dataframe, positions, writer, worksheet, workbook)
+        apply_conditional_formating_per_sample(protein_groups_dataframe, positions, worksheet, workbook)
+        write_dataframe_to_worksheet(worksheet, protein_groups_dataframe, header_format, hyperlink_format)
+
+        worksheet = workbook.add_worksheet('filtered away proteins')
+        write_dataframe_to_worksheet(worksheet, non_selected_dataframe, header_format, hyperlink_format)
 
-        writer.save()
+        workbook.close()
         gui_object.report_status("Finished writing away the data to the excel file {file_name}".format(file_name=settings_dict["make_excel_file_step"]["excel_file_name"]))
     except Exception as error:
         log_error(gui_object, "An error occured while trying to write away the data. The data will be written away as .csv file", error)
-        protein_groups_dataframe.to_csv("maxquant_saved_result.csv", sep=",", index=False)
+        dump_data_to_file(gui_object, protein_groups_dataframe, non_selected_dataframe, settings_dict["make_excel_file_step"]["excel_file_name"], "csv")
 
 
-def make_hyperlink(hyperlink):
+def dump_data_to_file(gui_object, protein_groups_dataframe, non_selected_dataframe, excel_file_name, output_format):
     """
+    Write the data and the filtered away proteins to two files next to the excel file, with the same columns as the excel sheets.
+    Parquet and feather need the optional pyarrow package.
     input:
-    hyperlink = string
+    gui_object = PyQt5, Qapplication
+    protein_groups_dataframe = pd.DataFrame(), ordered by order_complexome_profiling_dataframe
+    non_selected_dataframe = pd.DataFrame(), proteins that have been filtered away in the analysis
+    excel_file_name = string, the file names are the excel file name with a different extension
+    output_format = string, one of OUTPUT_FORMATS or "csv"
     output:
-    hyperlink = string
+    None
     """
-    if "" != hyperlink and pd.isnull(hyperlink) == False:
-        identifier = hyperlink.split("/")[-1:][0]
-        return f'=HYPERLINK("{hyperlink}", "{identifier}")'
-    else:
-        return ""
+    data_file_path, filtered_file_path = get_output_file_paths(excel_file_name, output_format)
+    gui_object.report_status(f"Start writing away the data to {data_file_path} and {filtered_file_path}")
+    try:
+        for dataframe, file_path in ((protein_groups_dataframe, data_file_path), (non_selected_dataframe, filtered_file_path)):
+            if output_format == "parquet":
+                dataframe.to_parquet(file_path, index=False)
+            elif output_format == "feather":
+                dataframe.reset_index(drop=True).to_feather(file_path)
+            elif output_format == "tsv.gz":
+                dataframe.to_csv(file_path, sep="\t", index=False, compression="gzip")
+            elif output_format == "csv":
+                dataframe.to_csv(file_path, sep=",", index=False)
+        gui_object.report_status(f"Finished writing away the data to {data_file_path} and {filtered_file_path}")
+    except ImportError as import_error:
+        log_error(gui_object, f"Writing {output_format} files requires the pyarrow package, install it with 'pip install pyarrow'", import_error)
+    except Exception as error:
+        log_error(gui_object, f"An error occured while trying to write away the data as {output_format} file", error)
+
+
+def dump_data_to_html(gui_object, protein_groups_dataframe, excel_file_name):
+    """
+    Write the fraction values of the proteins as a html report with a heatmap per sample next to the excel file.
+    The heatmaps follow the clustering per sample or the global clustering whenever the clustering step has been executed.
+    input:
+    gui_object = PyQt5, Qapplication
+    protein_groups_dataframe = pd.DataFrame()
+    excel_file_name = string, the html file name is the excel file name with the .html extension
+    output:
+    None
+    """
+    html_file_path = get_output_file_paths(excel_file_name, "html")[0]
+    gui_object.report_status(f"Start writing away the heatmap report to {html_file_path}")
+    try:
+        sample_fraction_matrices, sample_order_columns = {}, {}
+        for sample_name, sample_columns in get_sample_column_mapping(protein_groups_dataframe).items():
+            fraction_names = [re.sub("^iBAQ ", "", sample_column) for sample_column in sample_columns]
+            sample_fraction_matrices[sample_name] = (fraction_names, protein_groups_dataframe[sample_columns].to_numpy(dtype=FRACTION_DTYPE))
+            if f"sample_{sample_name}_clustered" in protein_groups_dataframe.columns:
+                sample_order_columns[sample_name] = protein_groups_dataframe[f"sample_{sample_name}_clustered"].to_numpy(dtype="float64")
+        global_order_column = None
+        if "global_clustered" in protein_groups_dataframe.columns:
+            global_order_column = protein_groups_dataframe["global_clustered"].to_numpy(dtype="float64")
+        gene_names = get_text_column_values(protein_groups_dataframe, "gene_name")
+        protein_ids = get_text_column_values(protein_groups_dataframe, "Majority protein IDs")
+        write_heatmap_report(html_file_path, os.path.basename(os.path.splitext(excel_file_name)[0]), sample_fraction_matrices, sample_order_columns,
+                             global_order_column, gene_names, protein_ids)
+        gui_object.report_status(f"Finished writing away the heatmap report to {html_file_path}")
+    except Exception as error:
+        log_error(gui_object, "An error occured while trying to write away the heatmap report", error)
+
+
+def get_text_column_values(dataframe, column_name):
+    """
+    input:
+    dataframe = pd.DataFrame()
+    column_name = string
+    output:
+    list, the values of the column as strings with an empty string for missing values, only empty strings when the column is not present
+    """
+    if column_name not in dataframe.columns:
+        return [""] * dataframe.shape[0]
+    return dataframe[column_name].astype(object).fillna("").astype(str).tolist()
+
+
+def get_output_file_paths(excel_file_name, output_format):
+    """
+    input:
+    excel_file_name = string
+    output_format = string
+    output:
+    data_file_path = string
+    filtered_file_path = string
+    """
+    file_name_base = os.path.splitext(excel_file_name)[0]
+    return f"{file_name_base}.{output_format}", f"{file_name_base}_filtered_away_proteins.{output_format}"
+
+
+def write_dataframe_to_worksheet(worksheet, dataframe, header_format, hyperlink_format):
+    """
+    Write the column names and the rows of the dataframe to the worksheet. The rows are converted to python values per chunk of
+    EXCEL_WRITE_CHUNK_ROWS rows, so only one chunk is copied at a time. Missing values are written as empty cells.
+    The links in the HYPERLINK_COLUMNS are written as hyperlinks showing the identifier at the end of the link,
+    once the worksheet holds EXCEL_MAX_HYPERLINKS_PER_WORKSHEET hyperlinks the remaining links are written as text.
+    input:
+    worksheet = xlsxwriter.Worksheet
+    dataframe = pd.DataFrame()
+    header_format = xlsxwriter.Format
+    hyperlink_format = xlsxwriter.Format
+    output:
+    None
+    """
+    worksheet.write_row(0, 0, [str(column_name) for column_name in dataframe.columns], header_format)
+    hyperlink_column_positions = [column_position for column_position, column_name in enumerate(dataframe.columns) if column_name in HYPERLINK_COLUMNS]
+    hyperlink_amount, text_link_amount = 0, 0
+    for start_row in range(0, dataframe.shape[0], EXCEL_WRITE_CHUNK_ROWS):
+        dataframe_chunk = dataframe.iloc[start_row:start_row + EXCEL_WRITE_CHUNK_ROWS].astype(object)
+        dataframe_chunk = dataframe_chunk.where(dataframe_chunk.notna(), None)
+        for row_number, row_values in enumerate(dataframe_chunk.itertuples(index=False, name=None), start=start_row + 1):
+            worksheet.write_row(row_number, 0, row_values)
+            for column_position in hyperlink_column_positions:
+                hyperlink = row_values[column_position]
+                if not isinstance(hyperlink, str) or hyperlink == "":
+                    continue
+                if hyperlink_amount < EXCEL_MAX_HYPERLINKS_PER_WORKSHEET:
+                    worksheet.write_url(row_number, column_position, hyperlink, hyperlink_format, hyperlink.split("/")[-1])
+                    hyperlink_amount += 1
+                else:
+                    text_link_amount += 1
+    if text_link_amount > 0:
+        logging.warning(f"The worksheet {worksheet.get_name()} contains more than {EXCEL_MAX_HYPERLINKS_PER_WORKSHEET} links, {text_link_amount} links are written as text")
+
 
 def order_complexome_profiling_dataframe(protein_groups_dataframe, ordered_columns, settings_dict):
     """
@@ -979,14 +2002,16 @@ def get_ordered_sample_columns(complexome_profiling_dataframe):
     ordered_columns = []
     global_cluster_column = "global_clustered"
     global_total_protein_abundance_column = "global_summed_iBAQ_value"
-    sample_names = get_sample_names(complexome_profiling_dataframe)
-    sample_names = order_sample_names_alphabetically(sample_names)
+    sample_column_mapping = get_sample_column_mapping(complexome_profiling_dataframe)
+    sample_names = order_sample_names_alphabetically(sample_column_mapping.keys())
 
     for sample_name in sample_names:
-        sample_columns = complexome_profiling_dataframe.filter(regex=f"iBAQ {sample_name}_").columns
-        ordered_columns.extend(sample_columns)
+        ordered_columns.extend(sample_column_mapping[sample_name])
         ordered_columns.append(f'sample_{sample_name}_clustered')
         ordered_columns.append(f"{sample_name}_summed_iBAQ_value")
+        for fraction_summary_column in [f"{sample_name}_max_iBAQ_value", f"{sample_name}_peak_fraction"]:
+            if fraction_summary_column in complexome_profiling_dataframe.columns:
+                ordered_columns.append(fraction_summary_column)
 
     #add global clustering column to the end of the ordered_columns list:
     ordered_columns.append(global_cluster_column)
@@ -1028,32 +2053,30 @@ def get_sample_positions(column_names):
         positions.append([start_position, end_position])
     return positions
 
-def apply_conditional_formating_per_sample(complexome_profiling_dataframe, positions, writer, worksheet, workbook):
+def apply_conditional_formating_per_sample(complexome_profiling_dataframe, positions, worksheet, workbook):
     """
     Per sample, apply conditional formatting using the positions
     input:
     complexome_profiling_dataframe = pd.DataFrame()
     positions = list, [[start_position, end_position],[start_position, end_position]]
-    writer = pd.ExcelWriter object
-    worksheet = writer.sheets object
-    workbook = writer.book object
+    worksheet = xlsxwriter.Worksheet
+    workbook = xlsxwriter.Workbook
     output:
     complexome_profiling_dataframe = pd.DataFrame()
     """
     for start_position, end_position in positions:
         worksheet.set_column(start_position,end_position, 0.5)
-        apply_cond_format(complexome_profiling_dataframe,start_position,end_position,writer,worksheet,workbook)
+        apply_cond_format(complexome_profiling_dataframe,start_position,end_position,worksheet,workbook)
 
-def apply_cond_format(dataframe,startcol,endcol,writer,worksheet,workbook):
+def apply_cond_format(dataframe,startcol,endcol,worksheet,workbook):
     """
     Apply conditional formatting to relevant columns
     input:
     dataframe = pd.DataFrame()
     startcol = int
     endcol = int
-    writer = pd.ExcelWriter
-    worksheet = writer.worksheets
-    workbook = writer.workbook
+    worksheet = xlsxwriter.Worksheet
+    workbook = xlsxwriter.Workbook
     output:
     None
     """
@@ -1082,13 +2105,14 @@ def filter_dataframe_step(gui_object, protein_groups_dataframe, settings_dict):
 
         protein_groups_dataframe = filter_dataframe_columns(gui_object, protein_groups_dataframe, settings_dict["filtering_step"])
         protein_groups_dataframe, filtered_groups_dataframe = filter_dataframe_rows(protein_groups_dataframe, settings_dict["filtering_step"])
+        protein_groups_dataframe = compact_protein_groups_dataframe(protein_groups_dataframe)
         #Reset the index, through this way new columns can be added to the dataframe
         protein_groups_dataframe.reset_index(inplace=True)
         protein_groups_dataframe.dropna(axis="index", inplace=True)
         identifiers = fetch_identifiers(protein_groups_dataframe)
         protein_groups_dataframe['identifier'] = identifiers
 
-        add_protein_abundance_columns(protein_groups_dataframe)
+        add_protein_abundance_columns(protein_groups_dataframe, settings_dict["filtering_step"]["ADD_FRACTION_SUMMARY_COLUMNS"])
 
         gui_object.report_status("Step 1, filtering the dataframe, is finished")
         return protein_groups_dataframe, filtered_groups_dataframe
@@ -1097,50 +2121,110 @@ def filter_dataframe_step(gui_object, protein_groups_dataframe, settings_dict):
         return protein_groups_dataframe, pd.DataFrame()
 
 
-def add_protein_abundance_columns(protein_groups_dataframe):
+def compact_protein_groups_dataframe(protein_groups_dataframe):
+    """
+    Store the fraction columns of all samples in one contiguous FRACTION_DTYPE block. Reading in chunks leaves a separate block of memory
+    per column, with a single block the clustering step gets the fraction matrix without copying it.
+    The other columns are not copied.
+    input:
+    protein_groups_dataframe = pd.DataFrame()
+    output:
+    protein_groups_dataframe = pd.DataFrame()
+    """
+    column_order = protein_groups_dataframe.columns
+    fraction_columns = [column for sample_columns in get_sample_column_mapping(protein_groups_dataframe).values() for column in sample_columns]
+    fraction_dataframe = pd.DataFrame(protein_groups_dataframe[fraction_columns].to_numpy(dtype=FRACTION_DTYPE), index=protein_groups_dataframe.index,
+                                      columns=fraction_columns, copy=False)
+    protein_groups_dataframe = pd.concat([protein_groups_dataframe.drop(columns=fraction_columns), fraction_dataframe], axis=1)
+    return protein_groups_dataframe[column_order]
+
+
+def add_protein_abundance_columns(protein_groups_dataframe, add_fraction_summary_columns):
     """
     Per sample for each protein, add the protein abundances of each fraction together.
     Additionally, add the protein abundances of each fraction from all samples together.
+    The fraction columns are taken once as a FRACTION_DTYPE matrix, the sums of each sample are accumulated in float64 without a float64 copy of the matrix.
+    Whenever add_fraction_summary_columns is enabled, the highest fraction abundance and the fraction number of this peak, as written in the column name, are added per sample as well.
     input:
     protein_groups_dataframe = pd.Dataframe
+    add_fraction_summary_columns = boolean
     output:
     protein_groups_dataframe = pd.Dataframe
     """
-    sample_names = get_sample_names(protein_groups_dataframe)
+    sample_column_mapping = get_sample_column_mapping(protein_groups_dataframe)
+    sample_names = list(sample_column_mapping.keys())
+    fraction_columns = [column for sample_name in sample_names for column in sample_column_mapping[sample_name]]
+    fraction_matrix = protein_groups_dataframe[fraction_columns].to_numpy(dtype=FRACTION_DTYPE, copy=True)
+    np.copyto(fraction_matrix, 0.0, where=np.isnan(fraction_matrix))
+
+    sample_boundaries = []
+    start_position = 0
     for sample_name in sample_names:
-        sample_columns = protein_groups_dataframe.filter(regex=f"iBAQ {sample_name}_").columns
-        sample_protein_abundances = protein_groups_dataframe[sample_columns].apply(summing_protein_abundances, axis=1)
-        protein_groups_dataframe[f"{sample_name}_summed_iBAQ_value"] = sample_protein_abundances
-    protein_abundance_sample_columns = [f"{sample_name}_summed_iBAQ_value" for sample_name in sample_names]
-    global_protein_abundances = protein_groups_dataframe[protein_abundance_sample_columns].apply(summing_protein_abundances, axis=1)
-    protein_groups_dataframe["global_summed_iBAQ_value"] = global_protein_abundances
+        end_position = start_position + len(sample_column_mapping[sample_name])
+        sample_boundaries.append((start_position, end_position))
+        start_position = end_position
+    sample_protein_abundances = np.zeros((len(fraction_matrix), len(sample_names)))
+    for sample_index, (start_position, end_position) in enumerate(sample_boundaries):
+        fraction_matrix[:, start_position:end_position].sum(axis=1, dtype="float64", out=sample_protein_abundances[:, sample_index])
+
+    for sample_index, sample_name in enumerate(sample_names):
+        protein_groups_dataframe[f"{sample_name}_summed_iBAQ_value"] = sample_protein_abundances[:, sample_index]
+    protein_groups_dataframe["global_summed_iBAQ_value"] = sample_protein_abundances.sum(axis=1)
+
+    if add_fraction_summary_columns == True:
+        for sample_name, (start_position, end_position) in zip(sample_names, sample_boundaries):
+            sample_fraction_matrix = fraction_matrix[:, start_position:end_position]
+            fraction_numbers = get_fraction_numbers(sample_column_mapping[sample_name])
+            max_fraction_abundances = sample_fraction_matrix.max(axis=1)
+            protein_groups_dataframe[f"{sample_name}_max_iBAQ_value"] = max_fraction_abundances
+            protein_groups_dataframe[f"{sample_name}_peak_fraction"] = np.where(max_fraction_abundances > 0, fraction_numbers[sample_fraction_matrix.argmax(axis=1)], np.nan)
+
+
+def get_fraction_numbers(fraction_columns):
+    """
+    Get the fraction number from the end of each fraction column name, e.g. 'iBAQ Sample_03' -> 3.
+    Whenever a column name doesn't end with a number, the (1-based) position of the column is used instead.
+    input:
+    fraction_columns = list, list of column names of a single sample
+    output:
+    fraction_numbers = np.array, one fraction number per column
+    """
+    fraction_numbers = np.arange(1, len(fraction_columns) + 1, dtype="float64")
+    for column_index, fraction_column in enumerate(fraction_columns):
+        fraction_number_match = FRACTION_NUMBER_PATTERN.search(fraction_column)
+        if fraction_number_match is not None:
+            fraction_numbers[column_index] = int(fraction_number_match.group(1))
+    return fraction_numbers
 
 
-def get_sample_names(protein_groups_dataframe):
+def get_sample_column_mapping(protein_groups_dataframe):
     """
-    Get the available sample names from the main dataframe
+    Map each sample to its fraction columns, the fraction columns are named 'iBAQ <sample name>_<fraction number>'.
     input:
     protein_groups_dataframe = pd.Dataframe()
     output:
-    sample_names = list, list of strings
+    sample_column_mapping = dict{sample_name : [column names]}, the columns are in the same order as in the dataframe
     """
     all_sample_columns = protein_groups_dataframe.columns.str.contains(pat="^iBAQ ", case=True, na=False, regex=True)
-    sample_names_with_fraction_ids = protein_groups_dataframe.columns[all_sample_columns].str.replace(pat="^iBAQ ", repl="", case=True, regex=True)
+    sample_columns = protein_groups_dataframe.columns[all_sample_columns]
+    sample_names_with_fraction_ids = sample_columns.str.replace(pat="^iBAQ ", repl="", case=True, regex=True)
     sample_names = sample_names_with_fraction_ids.str.replace(pat="_[$0-9]{2}", repl="", case=True, regex=True)
-    sample_names = set(sample_names.tolist())
 
-    return sample_names
+    sample_column_mapping = {}
+    for sample_column, sample_name in zip(sample_columns, sample_names):
+        sample_column_mapping.setdefault(sample_name, []).append(sample_column)
+    return sample_column_mapping
 
 
-def summing_protein_abundances(protein_abundances):
+def get_sample_names(protein_groups_dataframe):
     """
-    For the sample, add the protein abundances per fraction together for each protein.
+    Get the available sample names from the main dataframe
     input:
-    protein_abundances = pd.Series()
+    protein_groups_dataframe = pd.Dataframe()
     output:
-    sample_protein_abundances = pd.Series(), the summed protein abundances for the given sample where the value corresponds to the index of the main dataframe
+    sample_names = list, list of strings
     """
-    return pd.Series.sum(protein_abundances)
+    return set(get_sample_column_mapping(protein_groups_dataframe).keys())
 
 
 def fetch_uniprot_annotation_step(gui_object, protein_groups_dataframe, settings_dict):
@@ -1151,11 +2235,15 @@ def fetch_uniprot_annotation_step(gui_object, protein_groups_dataframe, settings
     settings_dict = dict, dictionary with user defined settings
     output:
     protein_groups_dataframe = pd.DataFrame()
+    boolean, True == all proteins were queried to uniprot, or uniprot was not queried, and False == one or more batches failed
     """
     if settings_dict["steps_dict"]["uniprot_step"] == True and evaluate_uniprot_settings(settings_dict["uniprot_step"]["uniprot_options"]) == True:
         if are_identifiers_not_available(protein_groups_dataframe["identifier"]) == False:
-            protein_data_dict = fetch_uniprot_annotation(gui_object, protein_groups_dataframe["identifier"], settings_dict["uniprot_step"])
+            protein_data_dict, failed_batch_amount = fetch_uniprot_annotation(gui_object, protein_groups_dataframe["identifier"], settings_dict["uniprot_step"])
+            if gui_object.is_cancel_requested() == True:
+                return protein_groups_dataframe, False
             protein_groups_dataframe = append_uniprot_data_to_dataframe(protein_groups_dataframe, protein_data_dict, settings_dict["uniprot_step"]["uniprot_options"])
+            return protein_groups_dataframe, failed_batch_amount == 0
         else:
             gui_object.report_status("Uniprot will not be queried because no uniprot identifiers were found in the \'Fasta headers\' column.")
     else:
@@ -1163,7 +2251,7 @@ def fetch_uniprot_annotation_step(gui_object, protein_groups_dataframe, settings
             gui_object.report_status("Uniprot will not be queried for information due to the step being disabled")
         elif evaluate_uniprot_settings(settings_dict["uniprot_step"]["uniprot_options"]) == False:
             gui_object.report_status("Uniprot will not be queried for information because the step is enabled, but all the fields are disabled")
-    return protein_groups_dataframe
+    return protein_groups_dataframe, True
 
 def is_protein_in_mitocarta_step(gui_object, settings_dict, protein_groups_dataframe):
     """
@@ -1181,12 +2269,16 @@ def is_protein_in_mitocarta_step(gui_object, settings_dict, protein_groups_dataf
             are_identifiers_not_available(protein_groups_dataframe["identifier"]) == False or \
             (settings_dict["mitocarta_step"]["evaluate_symbol_column"] == False and settings_dict["mitocarta_step"]["evaluate_additional_symbol_column"] == False):
 
-        mitocarta_mouse_dataframe = read_in_excel_file(gui_object, settings_dict["mitocarta_step"]["mitocarta_mouse_ftp_link"], settings_dict["mitocarta_step"]["mouse_sheet_name"])
-        mitocarta_human_dataframe = read_in_excel_file(gui_object, settings_dict["mitocarta_step"]["mitocarta_human_ftp_link"], settings_dict["mitocarta_step"]["human_sheet_name"])
+        mitocarta_mouse_dataframe = load_mitocarta_reference(gui_object, settings_dict["mitocarta_step"]["mitocarta_mouse_ftp_link"], settings_dict["mitocarta_step"]["mouse_sheet_name"],
+                                                             settings_dict["mitocarta_step"]["mitocarta_reference_directory"], False)
+        mitocarta_human_dataframe = load_mitocarta_reference(gui_object, settings_dict["mitocarta_step"]["mitocarta_human_ftp_link"], settings_dict["mitocarta_step"]["human_sheet_name"],
+                                                             settings_dict["mitocarta_step"]["mitocarta_reference_directory"], False)
+        if mitocarta_mouse_dataframe is None or mitocarta_human_dataframe is None:
+            return None, False
         if validate_mitocarta_input(gui_object, mitocarta_mouse_dataframe, settings_dict["mitocarta_step"]["mitocarta_symbol_column"],
                                  settings_dict["mitocarta_step"]["mitocarta_additional_symbol_column"], "Mouse") == False:
             return None, False
-        if validate_mitocarta_input(gui_object, mitocarta_mouse_dataframe, settings_dict["mitocarta_step"]["mitocarta_symbol_column"],
+        if validate_mitocarta_input(gui_object, mitocarta_human_dataframe, settings_dict["mitocarta_step"]["mitocarta_symbol_column"],
                                  settings_dict["mitocarta_step"]["mitocarta_additional_symbol_column"], "Human") == False:
             return None, False
 
@@ -1245,25 +2337,266 @@ def apply_clustering_step(gui_object, settings_dict, protein_groups_dataframe):
     settings_dict = dict, dictionary with user defined settings
     output:
     protein_groups_dataframe = pd.DataFrame()
+    is_step_complete = boolean, True == every sample has been clustered and False == a clustering was skipped or failed
     """
+    is_step_complete = True
     if settings_dict["steps_dict"]["clustering_step"] == True:
         gui_object.report_status("Step 4, cluster the fractions per sample using hierarchical clustering.")
-        sample_names = get_sample_names(protein_groups_dataframe)
-
-        for sample_name in sample_names:
-            logging.info(f"Start hierarchical clustering for sample {sample_name}")
-            sample_specific_dataframe = pd.DataFrame(protein_groups_dataframe[protein_groups_dataframe.columns[protein_groups_dataframe.columns.to_series().str.contains(pat=f"iBAQ {sample_name}", regex=True)]], dtype="float64")
-            order_mapping, clustered = cluster_reorder(gui_object, sample_specific_dataframe, settings_dict["clustering_step"]["method"], settings_dict["clustering_step"]["metric"])
-            protein_groups_dataframe[f'sample_{sample_name}_clustered'] = pd.Series(order_mapping)
-            logging.info(f"Finished hierarchical clustering for sample {sample_name}")
-        logging.info("Start hierarchical clustering for all samples")
-        global_order_mapping, global_clustered = cluster_reorder(gui_object, protein_groups_dataframe[protein_groups_dataframe.columns[protein_groups_dataframe.columns.to_series().str.contains("iBAQ ")]])
-        protein_groups_dataframe['global_clustered'] = pd.Series(global_order_mapping)
+        sample_column_mapping = get_sample_column_mapping(protein_groups_dataframe)
+        fraction_columns = [column for sample_columns in sample_column_mapping.values() for column in sample_columns]
+        fraction_matrix = protein_groups_dataframe[fraction_columns].to_numpy(dtype=FRACTION_DTYPE)
+
+        #each clustering job clusters a consecutive range of fraction columns, the global clustering uses all columns.
+        #the jobs get views of the fraction matrix, only the columns of the running job are converted to float64:
+        clustering_jobs = []
+        start_column = 0
+        for sample_name, sample_columns in sample_column_mapping.items():
+            clustering_jobs.append((f'sample_{sample_name}_clustered', start_column, start_column + len(sample_columns)))
+            start_column += len(sample_columns)
+        clustering_jobs.append(('global_clustered', 0, len(fraction_columns)))
+        cluster_column_names = [cluster_column_name for cluster_column_name, start_column, end_column in clustering_jobs]
+
+        #incremental reprocessing is part of use_checkpoints, reuse_cluster_orders enables it without storing the other steps
+        cluster_order_keys = {}
+        if settings_dict["checkpoint_settings"]["reuse_cluster_orders"] == True or settings_dict["checkpoint_settings"]["use_checkpoints"] == True:
+            cluster_order_keys = get_cluster_order_keys(protein_groups_dataframe, fraction_matrix, clustering_jobs, settings_dict["clustering_step"])
+            clustering_jobs = load_stored_cluster_orders(gui_object, protein_groups_dataframe, clustering_jobs, cluster_order_keys,
+                                                         settings_dict["checkpoint_settings"]["checkpoint_directory"])
+
+        clustering_processes = get_clustering_process_amount(settings_dict["clustering_step"]["clustering_processes"], len(clustering_jobs))
+        if clustering_processes == 1:
+            for cluster_column_name, start_column, end_column in clustering_jobs:
+                if gui_object.is_cancel_requested() == True:
+                    break
+                logging.info(f"Start hierarchical clustering for {cluster_column_name}")
+                order_mapping, clustered = cluster_reorder(gui_object, fraction_matrix[:, start_column:end_column], settings_dict["clustering_step"]["method"],
+                                                           settings_dict["clustering_step"]["metric"], settings_dict["clustering_step"]["memory_budget_mb"],
+                                                           settings_dict["clustering_step"]["optimal_leaf_ordering"])
+                protein_groups_dataframe[cluster_column_name] = get_cluster_order_column(order_mapping, len(protein_groups_dataframe))
+                logging.info(f"Finished hierarchical clustering for {cluster_column_name}")
+        elif len(clustering_jobs) > 0:
+            apply_parallel_clustering(gui_object, protein_groups_dataframe, fraction_matrix, clustering_jobs, clustering_processes, settings_dict["clustering_step"])
+        #the stored cluster orders are evicted once per clustering step, only whenever this step added cluster orders
+        if len(cluster_order_keys) > 0 and store_cluster_orders(gui_object, protein_groups_dataframe, clustering_jobs, cluster_order_keys,
+                                                                settings_dict["checkpoint_settings"]["checkpoint_directory"]) > 0:
+            evict_cluster_orders(settings_dict["checkpoint_settings"]["checkpoint_directory"], settings_dict["checkpoint_settings"]["cluster_order_expiration_days"],
+                                 settings_dict["checkpoint_settings"]["cluster_order_max_files"])
+        if len(protein_groups_dataframe) > 0:
+            is_step_complete = all(cluster_column_name in protein_groups_dataframe.columns and protein_groups_dataframe[cluster_column_name].notna().any()
+                                   for cluster_column_name in cluster_column_names)
         gui_object.report_status("Step 4, finished clustering the fractions per sample using hierarchical clustering.")
     else:
         gui_object.report_status("Step 4, clustering the fractions per sample using hierarchical clustering has been disabled.")
 
-    return protein_groups_dataframe
+    return protein_groups_dataframe, is_step_complete
+
+def get_cluster_order_keys(protein_groups_dataframe, fraction_matrix, clustering_jobs, clustering_settings):
+    """
+    The key of a clustering job depends on the protein IDs, the values of its fraction columns and the settings which change the
+    clustering result, so the order of a sample stays valid when other samples are added or changed.
+    input:
+    protein_groups_dataframe = pd.DataFrame()
+    fraction_matrix = np.array(), FRACTION_DTYPE matrix with the fraction columns of all samples
+    clustering_jobs = list, [(cluster_column_name, start_column, end_column)]
+    clustering_settings = dict["clustering_step"], dictionary with the user defined clustering parameters
+    output:
+    cluster_order_keys = dict{cluster_column_name : cluster_order_key}
+    """
+    if "Majority protein IDs" in protein_groups_dataframe.columns:
+        protein_ids = protein_groups_dataframe["Majority protein IDs"].astype(str).tolist()
+    else:
+        protein_ids = protein_groups_dataframe.index.astype(str).tolist()
+    protein_hash = hashlib.sha256("\n".join(protein_ids).encode("utf-8")).hexdigest()
+    clustering_parameters = json.dumps([clustering_settings["method"], clustering_settings["metric"], clustering_settings["optimal_leaf_ordering"]])
+    cluster_order_keys = {}
+    for cluster_column_name, start_column, end_column in clustering_jobs:
+        cluster_order_hash = hashlib.sha256(f"v{CLUSTER_ORDER_VERSION}|{protein_hash}|{clustering_parameters}|{end_column - start_column}|".encode("utf-8"))
+        cluster_order_hash.update(np.ascontiguousarray(fraction_matrix[:, start_column:end_column]).tobytes())
+        cluster_order_keys[cluster_column_name] = cluster_order_hash.hexdigest()
+    return cluster_order_keys
+
+
+def get_cluster_order_path(checkpoint_directory, cluster_order_key):
+    """
+    input:
+    checkpoint_directory = string
+    cluster_order_key = string
+    output:
+    cluster_order_path = string
+    """
+    return os.path.join(checkpoint_directory, CLUSTER_ORDER_DIRECTORY_NAME, f"{cluster_order_key[:32]}.npy")
+
+
+def load_stored_cluster_orders(gui_object, protein_groups_dataframe, clustering_jobs, cluster_order_keys, checkpoint_directory):
+    """
+    Add the stored cluster orders of earlier runs to the dataframe.
+    input:
+    gui_object = PyQt5, Qapplication
+    protein_groups_dataframe = pd.DataFrame()
+    clustering_jobs = list, [(cluster_column_name, start_column, end_column)]
+    cluster_order_keys = dict{cluster_column_name : cluster_order_key}
+    checkpoint_directory = string
+    output:
+    remaining_clustering_jobs = list, the clustering jobs without a stored cluster order
+    """
+    remaining_clustering_jobs = []
+    for clustering_job in clustering_jobs:
+        cluster_column_name = clustering_job[0]
+        cluster_order_path = get_cluster_order_path(checkpoint_directory, cluster_order_keys[cluster_column_name])
+        if not os.path.isfile(cluster_order_path):
+            remaining_clustering_jobs.append(clustering_job)
+            continue
+        try:
+            order_column = np.load(cluster_order_path, allow_pickle=False)
+        except Exception as error:
+            logging.error(f"The cluster order '{cluster_order_path}' could not be read and will be ignored: {error}")
+            remaining_clustering_jobs.append(clustering_job)
+            continue
+        if order_column.shape != (len(protein_groups_dataframe),):
+            remaining_clustering_jobs.append(clustering_job)
+            continue
+        protein_groups_dataframe[cluster_column_name] = order_column
+        #a reused cluster order counts as new for the eviction
+        try:
+            os.utime(cluster_order_path)
+        except OSError:
+            pass
+        gui_object.report_status(f"{cluster_column_name}: reusing the cluster order of an earlier run")
+    return remaining_clustering_jobs
+
+
+def store_cluster_orders(gui_object, protein_groups_dataframe, clustering_jobs, cluster_order_keys, checkpoint_directory):
+    """
+    Store the cluster orders which were computed in this run, failed or cancelled clusterings are not stored.
+    input:
+    gui_object = PyQt5, Qapplication
+    protein_groups_dataframe = pd.DataFrame()
+    clustering_jobs = list, [(cluster_column_name, start_column, end_column)]
+    cluster_order_keys = dict{cluster_column_name : cluster_order_key}
+    checkpoint_directory = string
+    output:
+    stored_cluster_order_amount = int
+    """
+    stored_cluster_order_amount = 0
+    try:
+        os.makedirs(os.path.join(checkpoint_directory, CLUSTER_ORDER_DIRECTORY_NAME), exist_ok=True)
+        for cluster_column_name, start_column, end_column in clustering_jobs:
+            if cluster_column_name not in protein_groups_dataframe.columns or protein_groups_dataframe[cluster_column_name].isna().all():
+                continue
+            cluster_order_path = get_cluster_order_path(checkpoint_directory, cluster_order_keys[cluster_column_name])
+            temporary_cluster_order_path = f"{cluster_order_path}.{os.getpid()}.tmp"
+            with open(temporary_cluster_order_path, "wb") as cluster_order_file:
+                np.save(cluster_order_file, protein_groups_dataframe[cluster_column_name].to_numpy(dtype="float64"), allow_pickle=False)
+            os.replace(temporary_cluster_order_path, cluster_order_path)
+            stored_cluster_order_amount += 1
+    except OSError as os_error:
+        log_error(gui_object, f"The cluster orders could not be stored in '{checkpoint_directory}'", os_error)
+    return stored_cluster_order_amount
+
+
+def evict_cluster_orders(checkpoint_directory, cluster_order_expiration_days, cluster_order_max_files):
+    """
+    Remove the cluster orders which have not been stored or reused for cluster_order_expiration_days and, whenever there are more than
+    cluster_order_max_files cluster orders, the oldest cluster orders. A value of 0 disables the corresponding eviction rule.
+    input:
+    checkpoint_directory = string
+    cluster_order_expiration_days = int
+    cluster_order_max_files = int
+    output:
+    None
+    """
+    cluster_order_directory = os.path.join(checkpoint_directory, CLUSTER_ORDER_DIRECTORY_NAME)
+    try:
+        cluster_order_files = []
+        for file_name in os.listdir(cluster_order_directory):
+            if file_name.endswith(".npy"):
+                cluster_order_path = os.path.join(cluster_order_directory, file_name)
+                cluster_order_files.append((os.path.getmtime(cluster_order_path), cluster_order_path))
+    except OSError:
+        return
+    cluster_order_files.sort(reverse=True)
+    expired_cluster_order_paths = []
+    if cluster_order_expiration_days > 0:
+        expiration_time = time.time() - cluster_order_expiration_days * 24 * 60 * 60
+        expired_cluster_order_paths.extend(cluster_order_path for modification_time, cluster_order_path in cluster_order_files if modification_time < expiration_time)
+    if cluster_order_max_files > 0:
+        expired_cluster_order_paths.extend(cluster_order_path for modification_time, cluster_order_path in cluster_order_files[cluster_order_max_files:])
+    for cluster_order_path in set(expired_cluster_order_paths):
+        try:
+            os.remove(cluster_order_path)
+        except OSError as os_error:
+            logging.error(f"The cluster order '{cluster_order_path}' could not be removed: {os_error}")
+
+
+def get_clustering_process_amount(clustering_processes, clustering_job_amount):
+    """
+    input:
+    clustering_processes = int, user defined amount of processes where 0 means all processor cores
+    clustering_job_amount = int
+    output:
+    clustering_processes = int, there are never more processes than clustering jobs
+    """
+    if clustering_processes == 0:
+        clustering_processes = os.cpu_count() or 1
+    return max(1, min(clustering_processes, clustering_job_amount))
+
+
+def apply_parallel_clustering(gui_object, protein_groups_dataframe, fraction_matrix, clustering_jobs, clustering_processes, clustering_settings):
+    """
+    Run the clustering jobs in a pool of worker processes. The fraction matrix is placed once in shared memory which all workers read from.
+    input:
+    gui_object = PyQt5, Qapplication
+    protein_groups_dataframe = pd.DataFrame()
+    fraction_matrix = np.array(), FRACTION_DTYPE matrix with the fraction columns of all samples
+    clustering_jobs = list, [(cluster_column_name, start_column, end_column)]
+    clustering_processes = int
+    clustering_settings = dict["clustering_step"], dictionary with the user defined clustering parameters
+    output:
+    None, the cluster columns are added to protein_groups_dataframe
+    """
+    gui_object.report_status(f"Clustering {len(clustering_jobs)} times using {clustering_processes} processes")
+    shared_memory = SharedMemory(create=True, size=max(fraction_matrix.nbytes, 1))
+    shared_fraction_matrix = None
+    #the executor is shut down without waiting on cancel or error, so the running clusterings don't keep the program waiting
+    executor = ProcessPoolExecutor(max_workers=clustering_processes)
+    is_executor_finished = False
+    try:
+        shared_fraction_matrix = np.ndarray(fraction_matrix.shape, dtype=FRACTION_DTYPE, buffer=shared_memory.buf)
+        shared_fraction_matrix[:] = fraction_matrix
+        clustering_futures = {}
+        for cluster_column_name, start_column, end_column in clustering_jobs:
+            protein_groups_dataframe[cluster_column_name] = np.nan
+            if is_clustering_within_memory_budget(gui_object, fraction_matrix.shape[0], clustering_settings["method"], clustering_settings["metric"],
+                                                  clustering_settings["memory_budget_mb"], clustering_settings["optimal_leaf_ordering"]) == False:
+                continue
+            clustering_future = executor.submit(cluster_shared_observations, shared_memory.name, fraction_matrix.shape, start_column, end_column,
+                                                clustering_settings["method"], clustering_settings["metric"], clustering_settings["optimal_leaf_ordering"])
+            clustering_futures[clustering_future] = cluster_column_name
+        pending_futures = set(clustering_futures)
+        while len(pending_futures) > 0:
+            if gui_object.is_cancel_requested() == True:
+                return
+            #wait at most a second, so a cancel request is noticed while the clusterings are running
+            finished_futures, pending_futures = wait(pending_futures, timeout=1, return_when=FIRST_COMPLETED)
+            for clustering_future in finished_futures:
+                cluster_column_name = clustering_futures[clustering_future]
+                try:
+                    ordered_index, clustering_times = clustering_future.result()
+                except Exception as error:
+                    log_error(gui_object, f"An exception occured while applying clustering for {cluster_column_name}", error)
+                    continue
+                gui_object.report_status(f"{cluster_column_name}: {get_clustering_time_message(fraction_matrix.shape[0], clustering_times)}")
+                order_mapping = {label: index_x for index_x, label in enumerate(ordered_index)}
+                protein_groups_dataframe[cluster_column_name] = get_cluster_order_column(order_mapping, len(protein_groups_dataframe))
+                logging.info(f"Finished hierarchical clustering for {cluster_column_name}")
+        is_executor_finished = True
+    finally:
+        executor.shutdown(wait=is_executor_finished, cancel_futures=True)
+        shared_fraction_matrix = None
+        shared_memory.close()
+        shared_memory.unlink()
+
+
 def dump_to_excel_step(gui_object, protein_groups_dataframe, filtered_groups_dataframe, settings_dict):
     """
     write away dataframe to an excel file:
@@ -1275,10 +2608,517 @@ def dump_to_excel_step(gui_object, protein_groups_dataframe, filtered_groups_dat
     None
     """
     if settings_dict["steps_dict"]["make_excel_file_step"] == True:
-        dump_data_to_excel(gui_object, protein_groups_dataframe, filtered_groups_dataframe, settings_dict)
+        #the filtered away proteins are indexed by their majority protein ids, which are written as a column
+        if filtered_groups_dataframe.index.name is not None:
+            filtered_groups_dataframe = filtered_groups_dataframe.reset_index()
+        try:
+            ordered_columns = get_ordered_sample_columns(protein_groups_dataframe)
+            protein_groups_dataframe = order_complexome_profiling_dataframe(protein_groups_dataframe, ordered_columns, settings_dict)
+            filtered_groups_dataframe = order_complexome_profiling_dataframe(filtered_groups_dataframe, [], settings_dict)
+        except Exception as error:
+            log_error(gui_object, "An error occured while ordering the columns of the data. The data will be written away as .csv file", error)
+            dump_data_to_file(gui_object, protein_groups_dataframe, filtered_groups_dataframe, settings_dict["make_excel_file_step"]["excel_file_name"], "csv")
+            return
+        output_formats = settings_dict["make_excel_file_step"]["output_formats"]
+        if "xlsx" in output_formats:
+            dump_data_to_excel(gui_object, protein_groups_dataframe, filtered_groups_dataframe, settings_dict)
+        for output_format in output_formats:
+            if output_format == "html":
+                dump_data_to_html(gui_object, protein_groups_dataframe, settings_dict["make_excel_file_step"]["excel_file_name"])
+            elif output_format != "xlsx":
+                dump_data_to_file(gui_object, protein_groups_dataframe, filtered_groups_dataframe, settings_dict["make_excel_file_step"]["excel_file_name"], output_format)
     else:
         logging.info("Step 5, writing away the data to an excel file, will not be executed because the user has disabled the step.")
         return
 
+
+def process_maxquant_file(gui_object, settings_dict, maxquant_file_path):
+    """
+    Read the maxquant file and execute the five steps. Whenever checkpoints are enabled the result of steps 1 to 4 is stored,
+    and the pipeline resumes from the latest checkpoint whose maxquant file and settings are unchanged.
+    Before every step the gui_object is asked whether the user cancelled the program, after every step the gui_object
+    receives the step name, the progress and the duration of the step through report_step_finished.
+    Whenever write_run_report is enabled, the measurements of every step are written to a json file next to the excel file.
+    input:
+    gui_object = PyQt5, Qapplication
+    settings_dict = dict, dictionary with user defined settings
+    maxquant_file_path = string
+    output:
+    boolean, True == the pipeline finished and False == the pipeline stopped because of an error or was cancelled
+    """
+    run_report = RunReport(maxquant_file_path, settings_dict)
+    is_pipeline_finished = execute_pipeline(gui_object, settings_dict, maxquant_file_path, run_report)
+    if settings_dict.get("make_excel_file_step", {}).get("write_run_report", False) == True:
+        run_report.write(gui_object, get_run_report_path(settings_dict["make_excel_file_step"]["excel_file_name"]), is_pipeline_finished,
+                         gui_object.is_cancel_requested())
+    return is_pipeline_finished
+
+
+def execute_pipeline(gui_object, settings_dict, maxquant_file_path, run_report):
+    """
+    input:
+    gui_object = PyQt5, Qapplication
+    settings_dict = dict, dictionary with user defined settings
+    maxquant_file_path = string
+    run_report = RunReport, receives the measurements of every executed step
+    output:
+    boolean, True == the pipeline finished and False == the pipeline stopped because of an error or was cancelled
+    """
+    #the settings and the columns of the maxquant file are validated before the checkpoint keys are computed, also when a checkpoint is resumed
+    header_dataframe = read_in_protein_groups_header(gui_object, maxquant_file_path)
+    if header_dataframe is None:
+        return False
+    if validate_user_parameters(gui_object, settings_dict, header_dataframe) == False:
+        return False
+    checkpoint_prefix, checkpoint_keys = get_checkpoint_keys(maxquant_file_path, settings_dict)
+    resumed_step_index, protein_groups_dataframe, filtered_groups_dataframe = load_latest_checkpoint(gui_object, settings_dict["checkpoint_settings"],
+                                                                                                     checkpoint_prefix, checkpoint_keys)
+    if resumed_step_index is None:
+        run_report.start_step()
+        protein_groups_dataframe, is_maxquant_file_loaded = read_in_protein_groups_file(gui_object, maxquant_file_path, settings_dict)
+        if is_maxquant_file_loaded == False:
+            return False
+        step_duration = run_report.finish_step(PIPELINE_STEPS[0], protein_groups_dataframe, None)
+        gui_object.report_step_finished(PIPELINE_STEPS[0], 1, len(PIPELINE_STEPS), step_duration)
+    else:
+        run_report.resumed_after_step = checkpoint_keys[resumed_step_index][0]
+
+    #an incomplete step is not stored, nor are the steps after it, so a next run executes the incomplete step again
+    is_result_complete = True
+    for step_index, (step_name, checkpoint_key) in enumerate(checkpoint_keys):
+        if resumed_step_index is not None and step_index <= resumed_step_index:
+            continue
+        if is_pipeline_cancelled(gui_object) == True:
+            return False
+        run_report.start_step()
+        protein_groups_dataframe, filtered_groups_dataframe, is_step_finished, is_step_complete = execute_pipeline_step(gui_object, step_name, settings_dict,
+                                                                                                                         protein_groups_dataframe, filtered_groups_dataframe)
+        if is_step_finished == False or is_pipeline_cancelled(gui_object) == True:
+            return False
+        if is_step_complete == False and is_result_complete == True:
+            is_result_complete = False
+            if settings_dict["checkpoint_settings"]["use_checkpoints"] == True:
+                gui_object.report_status(f"The {step_name} is incomplete, no checkpoints are stored for this step and the next steps.")
+        if is_result_complete == True:
+            save_checkpoint(gui_object, settings_dict["checkpoint_settings"], checkpoint_prefix, checkpoint_keys, step_index,
+                            protein_groups_dataframe, filtered_groups_dataframe)
+        step_duration = run_report.finish_step(step_name, protein_groups_dataframe, filtered_groups_dataframe)
+        gui_object.report_step_finished(step_name, step_index + 2, len(PIPELINE_STEPS), step_duration)
+
+    if is_pipeline_cancelled(gui_object) == True:
+        return False
+    run_report.start_step()
+    dump_to_excel_step(gui_object, protein_groups_dataframe, filtered_groups_dataframe, settings_dict)
+    step_duration = run_report.finish_step(PIPELINE_STEPS[-1], protein_groups_dataframe, filtered_groups_dataframe)
+    gui_object.report_step_finished(PIPELINE_STEPS[-1], len(PIPELINE_STEPS), len(PIPELINE_STEPS), step_duration)
+    return True
+
+
+def is_pipeline_cancelled(gui_object):
+    """
+    input:
+    gui_object = PyQt5, Qapplication
+    output:
+    boolean, True == the user cancelled the program and False == the program may continue
+    """
+    if gui_object.is_cancel_requested() == True:
+        gui_object.report_status("The program has been cancelled, the remaining steps will not be executed.")
+        return True
+    return False
+
+
+def execute_pipeline_step(gui_object, step_name, settings_dict, protein_groups_dataframe, filtered_groups_dataframe):
+    """
+    input:
+    gui_object = PyQt5, Qapplication
+    step_name = string, one of CHECKPOINT_STEPS
+    settings_dict = dict, dictionary with user defined settings
+    protein_groups_dataframe = pd.DataFrame()
+    filtered_groups_dataframe = pd.DataFrame()
+    output:
+    protein_groups_dataframe = pd.DataFrame()
+    filtered_groups_dataframe = pd.DataFrame()
+    boolean, True == the step finished and False == the pipeline should stop
+    boolean, True == the step is complete and False == the step finished partially (e.g. failed uniprot batches) and should not be stored as checkpoint
+    """
+    is_step_complete = True
+    if "filtering_step" == step_name:
+        protein_groups_dataframe, filtered_groups_dataframe = filter_dataframe_step(gui_object, protein_groups_dataframe, settings_dict)
+    elif "uniprot_step" == step_name:
+        protein_groups_dataframe, is_step_complete = fetch_uniprot_annotation_step(gui_object, protein_groups_dataframe, settings_dict)
+    elif "mitocarta_step" == step_name:
+        protein_groups_dataframe, are_mitocarta_columns_present = is_protein_in_mitocarta_step(gui_object, settings_dict, protein_groups_dataframe)
+        if are_mitocarta_columns_present == False:
+            return None, None, False, False
+    elif "clustering_step" == step_name:
+        protein_groups_dataframe, is_step_complete = apply_clustering_step(gui_object, settings_dict, protein_groups_dataframe)
+    return protein_groups_dataframe, filtered_groups_dataframe, True, is_step_complete
+
+
+def get_checkpoint_keys(maxquant_file_path, settings_dict):
+    """
+    Each checkpoint key depends on the maxquant file (path, size and modification time), the key of the previous step
+    and the settings of the step itself, so changing the settings of a step invalidates the checkpoints of that step and all later steps.
+    The settings in CHECKPOINT_IGNORED_SETTINGS don't change the result of a step and are not part of the key.
+    input:
+    maxquant_file_path = string
+    settings_dict = dict, dictionary with user defined settings
+    output:
+    checkpoint_prefix = string, hash of the path of the maxquant file which starts the name of all its checkpoint files
+    checkpoint_keys = list, [(step_name, checkpoint_key)] in the order of CHECKPOINT_STEPS
+    """
+    checkpoint_prefix = hashlib.sha256(os.path.abspath(maxquant_file_path).encode("utf-8")).hexdigest()[:12]
+    try:
+        file_status = os.stat(maxquant_file_path)
+        file_fingerprint = f"{os.path.abspath(maxquant_file_path)}|{file_status.st_size}|{file_status.st_mtime_ns}"
+    except OSError:
+        file_fingerprint = os.path.abspath(maxquant_file_path)
+    checkpoint_key = hashlib.sha256(f"v{CHECKPOINT_VERSION}|{file_fingerprint}".encode("utf-8")).hexdigest()
+    checkpoint_keys = []
+    for step_name in CHECKPOINT_STEPS:
+        step_settings = {parameter: value for parameter, value in settings_dict[step_name].items() if parameter not in CHECKPOINT_IGNORED_SETTINGS.get(step_name, ())}
+        step_settings = json.dumps([settings_dict["steps_dict"][step_name], step_settings], sort_keys=True)
+        checkpoint_key = hashlib.sha256(f"{checkpoint_key}|{step_name}|{step_settings}".encode("utf-8")).hexdigest()
+        checkpoint_keys.append((step_name, checkpoint_key))
+    return checkpoint_prefix, checkpoint_keys
+
+
+def get_checkpoint_path(checkpoint_directory, checkpoint_prefix, checkpoint_keys, step_index):
+    """
+    The file name starts with the checkpoint prefix, so the checkpoints of different maxquant files can share a directory.
+    The filtered dataframe is stored next to it, in the file which ends with _filtered.parquet.
+    input:
+    checkpoint_directory = string
+    checkpoint_prefix = string
+    checkpoint_keys = list, [(step_name, checkpoint_key)]
+    step_index = int
+    output:
+    checkpoint_path = string
+    """
+    step_name, checkpoint_key = checkpoint_keys[step_index]
+    return os.path.join(checkpoint_directory, f"{checkpoint_prefix}_{step_index + 1}_{step_name}_{checkpoint_key[:16]}.parquet")
+
+
+def load_latest_checkpoint(gui_object, checkpoint_settings, checkpoint_prefix, checkpoint_keys):
+    """
+    input:
+    gui_object = PyQt5, Qapplication
+    checkpoint_settings = dict["checkpoint_settings"]
+    checkpoint_prefix = string
+    checkpoint_keys = list, [(step_name, checkpoint_key)]
+    output:
+    resumed_step_index = int, index of the step in CHECKPOINT_STEPS which was loaded, None whenever no valid checkpoint was found
+    protein_groups_dataframe = pd.DataFrame()
+    filtered_groups_dataframe = pd.DataFrame()
+    """
+    if checkpoint_settings["use_checkpoints"] == False:
+        return None, None, None
+    for step_index in reversed(range(len(checkpoint_keys))):
+        checkpoint_path = get_checkpoint_path(checkpoint_settings["checkpoint_directory"], checkpoint_prefix, checkpoint_keys, step_index)
+        if not os.path.isfile(checkpoint_path):
+            continue
+        filtered_checkpoint_path = get_filtered_checkpoint_path(checkpoint_path)
+        try:
+            protein_groups_dataframe = pd.read_parquet(checkpoint_path)
+            filtered_groups_dataframe = pd.read_parquet(filtered_checkpoint_path) if os.path.isfile(filtered_checkpoint_path) else None
+        except Exception as error:
+            logging.error(f"The checkpoint \'{checkpoint_path}\' could not be read and will be ignored: {error}")
+            continue
+        gui_object.report_status(f"Resuming after {checkpoint_keys[step_index][0]} from the checkpoint \'{checkpoint_path}\'")
+        return step_index, protein_groups_dataframe, filtered_groups_dataframe
+    return None, None, None
+
+
+def save_checkpoint(gui_object, checkpoint_settings, checkpoint_prefix, checkpoint_keys, step_index, protein_groups_dataframe, filtered_groups_dataframe):
+    """
+    Store the dataframes after a step and remove the outdated checkpoints of this step for the same maxquant file.
+    input:
+    gui_object = PyQt5, Qapplication
+    checkpoint_settings = dict["checkpoint_settings"]
+    checkpoint_prefix = string
+    checkpoint_keys = list, [(step_name, checkpoint_key)]
+    step_index = int
+    protein_groups_dataframe = pd.DataFrame()
+    filtered_groups_dataframe = pd.DataFrame()
+    output:
+    None
+    """
+    if checkpoint_settings["use_checkpoints"] == False:
+        return
+    checkpoint_directory = checkpoint_settings["checkpoint_directory"]
+    checkpoint_path = get_checkpoint_path(checkpoint_directory, checkpoint_prefix, checkpoint_keys, step_index)
+    try:
+        os.makedirs(checkpoint_directory, exist_ok=True)
+        outdated_checkpoint_prefix = f"{checkpoint_prefix}_{step_index + 1}_{checkpoint_keys[step_index][0]}_"
+        for file_name in os.listdir(checkpoint_directory):
+            if file_name.startswith(outdated_checkpoint_prefix):
+                os.remove(os.path.join(checkpoint_directory, file_name))
+        #the filtered dataframe is written first, so a checkpoint is only found once both dataframes have been written
+        if filtered_groups_dataframe is not None:
+            write_checkpoint_dataframe(filtered_groups_dataframe, get_filtered_checkpoint_path(checkpoint_path))
+        write_checkpoint_dataframe(protein_groups_dataframe, checkpoint_path)
+        logging.info(f"Stored the checkpoint after {checkpoint_keys[step_index][0]} at \'{checkpoint_path}\'")
+    except Exception as error:
+        log_error(gui_object, f"The checkpoint after {checkpoint_keys[step_index][0]} could not be stored in \'{checkpoint_directory}\'", error)
+
+
+def get_filtered_checkpoint_path(checkpoint_path):
+    """
+    input:
+    checkpoint_path = string, path of the checkpoint of the protein groups dataframe
+    output:
+    filtered_checkpoint_path = string
+    """
+    return f"{os.path.splitext(checkpoint_path)[0]}_filtered.parquet"
+
+
+def write_checkpoint_dataframe(dataframe, checkpoint_path):
+    """
+    Parquet files only contain data, unlike pickle files a checkpoint written by someone else in a shared directory can't run code when it is loaded.
+    The file is written to a temporary file first, so other processes never read a half written checkpoint.
+    input:
+    dataframe = pd.DataFrame()
+    checkpoint_path = string
+    output:
+    None
+    """
+    temporary_checkpoint_path = f"{checkpoint_path}.{os.getpid()}.tmp"
+    dataframe.to_parquet(temporary_checkpoint_path, engine="pyarrow")
+    os.replace(temporary_checkpoint_path, checkpoint_path)
+
+
+class NetworkStatistics:
+    """
+    Counts the requests and bytes sent to and received from uniprot. The counters are shared by the threads querying uniprot.
+    The bytes are those of the request url and body and of the response body as transferred (compressed), the headers are not counted.
+    """
+    def __init__(self):
+        """
+        input:
+        None
+        output:
+        None
+        """
+        self.request_amount = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.lock = threading.Lock()
+
+    def add_request(self, response):
+        """
+        input:
+        response = requests.Response, None whenever the connection failed
+        output:
+        None
+        """
+        bytes_sent, bytes_received = 0, 0
+        if response is not None:
+            request_body = response.request.body
+            if isinstance(request_body, str):
+                request_body = request_body.encode("utf-8")
+            bytes_sent = len(response.request.url) + (0 if request_body is None else len(request_body))
+            bytes_received = get_received_byte_amount(response)
+        with self.lock:
+            self.request_amount += 1
+            self.bytes_sent += bytes_sent
+            self.bytes_received += bytes_received
+
+    def get_counters(self):
+        """
+        input:
+        None
+        output:
+        dict{"network_requests":int, "network_bytes_sent":int, "network_bytes_received":int}
+        """
+        with self.lock:
+            return {"network_requests": self.request_amount, "network_bytes_sent": self.bytes_sent, "network_bytes_received": self.bytes_received}
+
+NETWORK_STATISTICS = NetworkStatistics()
+
+
+def get_received_byte_amount(response):
+    """
+    The size of the response body as it was transferred, before a gzip or deflate encoding is decoded.
+    input:
+    response = requests.Response, of which the content has been read
+    output:
+    received_byte_amount = int
+    """
+    received_byte_amount = len(response.content)
+    try:
+        transferred_byte_amount = response.raw.tell()
+    except (AttributeError, OSError):
+        return received_byte_amount
+    if isinstance(transferred_byte_amount, int) and transferred_byte_amount > 0:
+        return transferred_byte_amount
+    return received_byte_amount
+
+
+def get_peak_memory_mb():
+    """
+    The peak resident set size (memory) of the program since it started, None whenever it can't be determined.
+    The value is process wide and never decreases, the worker processes of the clustering are not included.
+    input:
+    None
+    output:
+    peak_memory_mb = float
+    """
+    try:
+        import resource
+        peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        #linux reports kilobytes and macOS bytes
+        return peak_memory / 1024 ** 2 if sys.platform == "darwin" else peak_memory / 1024
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        import ctypes.wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", ctypes.wintypes.DWORD), ("PageFaultCount", ctypes.wintypes.DWORD), ("PeakWorkingSetSize", ctypes.c_size_t),
+                        ("WorkingSetSize", ctypes.c_size_t), ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+        memory_counters = PROCESS_MEMORY_COUNTERS()
+        memory_counters.cb = ctypes.sizeof(PROCESS_MEMORY_COUNTERS)
+        if ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(memory_counters), memory_counters.cb):
+            return memory_counters.PeakWorkingSetSize / 1024 ** 2
+    except (AttributeError, OSError):
+        pass
+    return None
+
+
+def get_child_peak_memory_mb():
+    """
+    The peak resident set size (memory) of the largest finished worker process, e.g. of the clustering, None whenever it can't be determined.
+    input:
+    None
+    output:
+    peak_memory_mb = float
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak_memory = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak_memory / 1024 ** 2 if sys.platform == "darwin" else peak_memory / 1024
+
+
+class RunReport:
+    """
+    Measures the wall time, cpu time, peak memory, dataframe size and uniprot traffic of every step of a run.
+    """
+    def __init__(self, maxquant_file_path, settings_dict):
+        """
+        input:
+        maxquant_file_path = string
+        settings_dict = dict, dictionary with user defined settings
+        output:
+        None
+        """
+        self.maxquant_file_path = os.path.abspath(maxquant_file_path)
+        self.steps_dict = settings_dict.get("steps_dict", {})
+        self.started_at = time.time()
+        self.run_start_time = time.perf_counter()
+        self.resumed_after_step = None
+        self.step_measurements = []
+        self.step_start = None
+
+    def get_counters(self):
+        """
+        The cpu time of the worker processes (clustering) is only included on systems which report it for finished child processes.
+        input:
+        None
+        output:
+        dict
+        """
+        process_times = os.times()
+        counters = {"wall_time": time.perf_counter(), "cpu_time": time.process_time(),
+                    "child_cpu_time": process_times.children_user + process_times.children_system,
+                    "process_peak_memory_mb": get_peak_memory_mb()}
+        counters.update(NETWORK_STATISTICS.get_counters())
+        return counters
+
+    def start_step(self):
+        """
+        input:
+        None
+        output:
+        None
+        """
+        self.step_start = self.get_counters()
+
+    def finish_step(self, step_name, protein_groups_dataframe, filtered_groups_dataframe):
+        """
+        The peak memory of the program is process wide, process_peak_memory_increase_mb is how much the step raised it.
+        A step which stays below the peak of an earlier step has an increase of 0, while it can still use much memory.
+        input:
+        step_name = string
+        protein_groups_dataframe = pd.DataFrame()
+        filtered_groups_dataframe = pd.DataFrame(), None whenever the dataframe doesn't exist yet
+        output:
+        step_duration = float, wall time of the step in seconds
+        """
+        step_end = self.get_counters()
+        step_measurement = {"step": step_name,
+                            "wall_seconds": round(step_end["wall_time"] - self.step_start["wall_time"], 3),
+                            "cpu_seconds": round(step_end["cpu_time"] - self.step_start["cpu_time"], 3),
+                            "child_cpu_seconds": round(step_end["child_cpu_time"] - self.step_start["child_cpu_time"], 3),
+                            "process_peak_memory_mb": step_end["process_peak_memory_mb"],
+                            "process_peak_memory_increase_mb": None if step_end["process_peak_memory_mb"] is None else
+                                                               step_end["process_peak_memory_mb"] - self.step_start["process_peak_memory_mb"],
+                            "child_peak_memory_mb": get_child_peak_memory_mb(),
+                            "rows": None if protein_groups_dataframe is None else protein_groups_dataframe.shape[0],
+                            "columns": None if protein_groups_dataframe is None else protein_groups_dataframe.shape[1],
+                            "filtered_rows": None if filtered_groups_dataframe is None else filtered_groups_dataframe.shape[0]}
+        for counter_name in ("network_requests", "network_bytes_sent", "network_bytes_received"):
+            step_measurement[counter_name] = step_end[counter_name] - self.step_start[counter_name]
+        self.step_measurements.append(step_measurement)
+        logging.info(f"Run report {step_name}: {step_measurement}")
+        return step_measurement["wall_seconds"]
+
+    def write(self, gui_object, run_report_path, is_pipeline_finished, is_pipeline_cancelled):
+        """
+        input:
+        gui_object = PyQt5, Qapplication
+        run_report_path = string
+        is_pipeline_finished = boolean
+        is_pipeline_cancelled = boolean
+        output:
+        None
+        """
+        if is_pipeline_finished == True:
+            run_status = "finished"
+        elif is_pipeline_cancelled == True:
+            run_status = "cancelled"
+        else:
+            run_status = "failed"
+        run_report = {"maxquant_file": self.maxquant_file_path,
+                      "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+                      "status": run_status,
+                      "total_wall_seconds": round(time.perf_counter() - self.run_start_time, 3),
+                      "process_peak_memory_mb": get_peak_memory_mb(),
+                      "child_peak_memory_mb": get_child_peak_memory_mb(),
+                      "resumed_after_step": self.resumed_after_step,
+                      "steps_dict": self.steps_dict,
+                      "steps": self.step_measurements}
+        try:
+            with open(run_report_path, "w") as run_report_file:
+                json.dump(run_report, run_report_file, indent=4)
+            gui_object.report_status(f"The run report is written to {run_report_path}")
+        except OSError as os_error:
+            log_error(gui_object, f"The run report could not be written to {run_report_path}", os_error)
+
+
+def get_run_report_path(excel_file_name):
+    """
+    input:
+    excel_file_name = string
+    output:
+    run_report_path = string, json file next to the excel file
+    """
+    return f"{os.path.splitext(excel_file_name)[0]}_run_report.json"
+
+
 if __name__ == "__main__":
-    print("This script cannot be accessed directly, but should be called by 'gui_file_acceptor.py'.")
+    print("This script cannot be accessed directly, but should be called by 'gui_file_acceptor.py' or 'process_maxquant_cli.py'.")
@@ -0,0 +1,340 @@
+"""
+Description: This code serves to run the process_maxquant script without a gui, for one or a batch of maxquant files
+"""
+import sys
+import os.path
+import glob
+import copy
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from process_maxquant import load_json
+from process_maxquant import validate_user_parameters
+from process_maxquant import load_mitocarta_reference
+from process_maxquant import refresh_mitocarta_reference
+from process_maxquant import process_maxquant_file
+
+
+class ConsoleReporter:
+    """
+    Replaces the gui for the process_maxquant functions, the status and error messages are written to the console.
+    """
+    def __init__(self, label=None):
+        """
+        input:
+        label = string, printed in front of every message so the messages of the parallel processes can be told apart
+        output:
+        None
+        """
+        self.label = label
+
+    def get_message(self, message):
+        if self.label is None:
+            return message
+        return f"[{self.label}] {message}"
+
+    def report_status(self, status_message):
+        """"
+        input:
+        status_message = string
+        output:
+        None
+        """
+        print(self.get_message(status_message), flush=True)
+        logging.info(self.get_message(status_message))
+
+    def report_error(self, error_message):
+        """"
+        input:
+        error_message = string
+        output:
+        None
+        """
+        print(self.get_message(f"Error: {error_message}"), file=sys.stderr, flush=True)
+
+    def report_step_finished(self, step_name, finished_step_amount, step_amount, step_duration):
+        """"
+        input:
+        step_name = string
+        finished_step_amount = int
+        step_amount = int
+        step_duration = float, seconds
+        output:
+        None
+        """
+        self.report_status(f"Finished {step_name} in {step_duration:.1f} seconds ({finished_step_amount}/{step_amount})")
+
+    def is_cancel_requested(self):
+        """"
+        The command line runner is stopped with ctrl+c instead.
+        input:
+        None
+        output:
+        boolean
+        """
+        return False
+
+
+def parse_arguments(arguments):
+    """
+    input:
+    arguments = list, command line arguments without the program name
+    output:
+    argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description="Process one or more maxquant proteinGroups files without the gui.")
+    parser.add_argument("maxquant_files", nargs="+",
+                        help="maxquant files, glob patterns (e.g. 'project/*/proteinGroups.txt') or directories which are searched for proteinGroups.txt files")
+    parser.add_argument("-s", "--settings", required=True, help="the settings file in the json format")
+    parser.add_argument("-o", "--output-directory", default=None,
+                        help="directory for the excel files, by default each excel file is written next to its maxquant file")
+    parser.add_argument("-p", "--processes", type=int, default=1, help="how many maxquant files are processed at the same time (default: 1)")
+    parser.add_argument("--refresh-mitocarta", action="store_true",
+                        help="download the mitocarta files again before the batch starts, instead of using the stored files")
+    parser.add_argument("--log-file", default="process_maxquant_log.log", help="log file shared by all processes (default: process_maxquant_log.log)")
+    return parser.parse_args(arguments)
+
+
+def find_maxquant_files(maxquant_file_arguments):
+    """
+    input:
+    maxquant_file_arguments = list, file paths, glob patterns or directories
+    output:
+    maxquant_file_paths = list, absolute paths without duplicates in the order they were found
+    """
+    maxquant_file_paths = []
+    for maxquant_file_argument in maxquant_file_arguments:
+        if os.path.isdir(maxquant_file_argument):
+            found_paths = sorted(glob.glob(os.path.join(maxquant_file_argument, "**", "proteinGroups.txt"), recursive=True))
+        else:
+            found_paths = sorted(glob.glob(maxquant_file_argument))
+        for found_path in found_paths:
+            found_path = os.path.abspath(found_path)
+            if os.path.isfile(found_path) and found_path not in maxquant_file_paths:
+                maxquant_file_paths.append(found_path)
+    return maxquant_file_paths
+
+
+def get_common_directory(maxquant_file_paths):
+    """
+    input:
+    maxquant_file_paths = list, absolute paths
+    output:
+    common_directory = string, the deepest directory which contains all maxquant files
+    """
+    return os.path.commonpath([os.path.dirname(maxquant_file_path) for maxquant_file_path in maxquant_file_paths])
+
+
+def get_excel_file_name(maxquant_file_path, excel_file_name, output_directory, common_directory):
+    """
+    The maxquant files of a project usually share the name proteinGroups.txt and maxquant writes every run to .../combined/txt/,
+    so in a shared output directory the excel file name starts with the directories between common_directory and the maxquant file,
+    e.g. 'run1_combined_txt_<excel file name>'.
+    input:
+    maxquant_file_path = string
+    excel_file_name = string, dict["make_excel_file_step"]["excel_file_name"]
+    output_directory = string, None == write the excel file next to the maxquant file
+    common_directory = string, made by get_common_directory for all maxquant files of the batch
+    output:
+    excel_file_name = string
+    """
+    maxquant_directory = os.path.dirname(maxquant_file_path)
+    if output_directory is None:
+        return os.path.join(maxquant_directory, os.path.basename(excel_file_name))
+    relative_directory = os.path.relpath(maxquant_directory, common_directory)
+    if relative_directory == os.curdir:
+        relative_directory = os.path.basename(maxquant_directory)
+    name_prefix = "_".join(directory_name for directory_name in relative_directory.split(os.sep) if directory_name != "")
+    return os.path.join(output_directory, f"{name_prefix}_{os.path.basename(excel_file_name)}")
+
+
+def find_excel_file_name_collisions(batch_settings_dicts):
+    """
+    Two maxquant files with the same excel file name would overwrite each others excel file, run report and other output files.
+    input:
+    batch_settings_dicts = dict{maxquant_file_path : batch_settings_dict}
+    output:
+    collisions = list, [(excel_file_name, [maxquant_file_paths])] for every excel file name that is used more than once
+    """
+    maxquant_files_per_excel_file = {}
+    for maxquant_file_path, batch_settings_dict in batch_settings_dicts.items():
+        excel_file_name = os.path.normcase(os.path.abspath(batch_settings_dict["make_excel_file_step"]["excel_file_name"]))
+        maxquant_files_per_excel_file.setdefault(excel_file_name, []).append(maxquant_file_path)
+    return [(excel_file_name, maxquant_file_paths) for excel_file_name, maxquant_file_paths in maxquant_files_per_excel_file.items()
+            if len(maxquant_file_paths) > 1]
+
+
+def get_batch_settings(settings_dict, maxquant_file_path, output_directory, processes, common_directory):
+    """
+    Settings for a single maxquant file of the batch. The caches are shared by all processes, so their paths are made absolute,
+    and the uniprot request rate is divided over the processes so the batch as a whole stays within requests_per_second.
+    input:
+    settings_dict = dict, dictionary with user defined settings
+    maxquant_file_path = string
+    output_directory = string or None
+    processes = int
+    common_directory = string, made by get_common_directory for all maxquant files of the batch
+    output:
+    batch_settings_dict = dict
+    """
+    batch_settings_dict = copy.deepcopy(settings_dict)
+    batch_settings_dict["make_excel_file_step"]["excel_file_name"] = get_excel_file_name(maxquant_file_path, settings_dict["make_excel_file_step"]["excel_file_name"],
+                                                                                          output_directory, common_directory)
+    batch_settings_dict["uniprot_step"]["requests_per_second"] = settings_dict["uniprot_step"]["requests_per_second"] / processes
+    uniprot_cache_settings = batch_settings_dict["uniprot_step"]["uniprot_cache"]
+    uniprot_cache_settings["cache_file_path"] = os.path.abspath(uniprot_cache_settings["cache_file_path"])
+    mitocarta_settings = batch_settings_dict["mitocarta_step"]
+    mitocarta_settings["mitocarta_reference_directory"] = os.path.abspath(mitocarta_settings["mitocarta_reference_directory"])
+    batch_settings_dict["checkpoint_settings"]["checkpoint_directory"] = os.path.abspath(batch_settings_dict["checkpoint_settings"]["checkpoint_directory"])
+    return batch_settings_dict
+
+
+def prepare_mitocarta_reference(reporter, settings_dict, refresh_reference):
+    """
+    Download the mitocarta files into the reference store before the batch starts, so the processes only read the stored snapshots.
+    input:
+    reporter = ConsoleReporter
+    settings_dict = dict, dictionary with user defined settings
+    refresh_reference = boolean, True == download the mitocarta files again even when they are stored
+    output:
+    boolean, True == the reference store is ready or the mitocarta step is disabled and False == a mitocarta file could not be loaded
+    """
+    if refresh_reference == True:
+        return refresh_mitocarta_reference(reporter, settings_dict)
+    if settings_dict["steps_dict"]["mitocarta_step"] == False or settings_dict["steps_dict"]["uniprot_step"] == False:
+        return True
+    mitocarta_settings = settings_dict["mitocarta_step"]
+    for mitocarta_link, sheet_name in ((mitocarta_settings["mitocarta_human_ftp_link"], mitocarta_settings["human_sheet_name"]),
+                                       (mitocarta_settings["mitocarta_mouse_ftp_link"], mitocarta_settings["mouse_sheet_name"])):
+        mitocarta_dataframe = load_mitocarta_reference(reporter, mitocarta_link, sheet_name, mitocarta_settings["mitocarta_reference_directory"], False)
+        if mitocarta_dataframe is None:
+            return False
+    return True
+
+
+def process_maxquant_file_in_worker(maxquant_file_path, settings_dict, log_file):
+    """
+    Process a single maxquant file of the batch, an unhandled error only stops this maxquant file and not the rest of the batch.
+    In the main process the logging is already configured and basicConfig leaves it unchanged.
+    input:
+    maxquant_file_path = string
+    settings_dict = dict, settings made by get_batch_settings
+    log_file = string
+    output:
+    boolean, True == the maxquant file was processed and False == the pipeline stopped because of an error
+    """
+    logging.basicConfig(filename=log_file, filemode="a", level=logging.DEBUG,
+                        format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    reporter = ConsoleReporter(maxquant_file_path)
+    try:
+        return process_maxquant_file(reporter, settings_dict, maxquant_file_path)
+    except Exception as error:
+        logging.exception(f"A unhandled error has occurred while processing {maxquant_file_path}")
+        reporter.report_error(f"A unhandled error has occurred\n{error}")
+        return False
+
+
+def process_maxquant_files_in_pool(reporter, maxquant_file_paths, batch_settings_dicts, processes, log_file, failed_maxquant_file_paths):
+    """
+    input:
+    reporter = ConsoleReporter
+    maxquant_file_paths = list
+    batch_settings_dicts = dict{maxquant_file_path : batch_settings_dict}
+    processes = int
+    log_file = string
+    failed_maxquant_file_paths = list, the maxquant files that could not be processed are appended
+    output:
+    interrupted_maxquant_file_paths = list, the maxquant files that were not finished because a worker process stopped unexpectedly
+    """
+    interrupted_maxquant_file_paths = []
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        maxquant_file_futures = {executor.submit(process_maxquant_file_in_worker, maxquant_file_path, batch_settings_dicts[maxquant_file_path], log_file): maxquant_file_path
+                                 for maxquant_file_path in maxquant_file_paths}
+        for maxquant_file_future in as_completed(maxquant_file_futures):
+            maxquant_file_path = maxquant_file_futures[maxquant_file_future]
+            try:
+                if maxquant_file_future.result() == False:
+                    failed_maxquant_file_paths.append(maxquant_file_path)
+            except BrokenProcessPool as broken_process_pool:
+                logging.error(f"The worker process stopped unexpectedly while {maxquant_file_path} was processed or waiting: {broken_process_pool}")
+                interrupted_maxquant_file_paths.append(maxquant_file_path)
+            except Exception as error:
+                logging.exception(f"A unhandled error has occurred while processing {maxquant_file_path}")
+                reporter.report_error(f"A unhandled error has occurred while processing {maxquant_file_path}\n{error}")
+                failed_maxquant_file_paths.append(maxquant_file_path)
+    return interrupted_maxquant_file_paths
+
+
+def main(arguments):
+    """
+    input:
+    arguments = list, command line arguments without the program name
+    output:
+    int, exit code, 0 == all maxquant files were processed and 1 == one or more maxquant files failed
+    """
+    arguments = parse_arguments(arguments)
+    logging.basicConfig(filename=arguments.log_file, filemode="w", level=logging.DEBUG,
+                        format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    reporter = ConsoleReporter()
+
+    if arguments.processes < 1:
+        reporter.report_error(f"The amount of processes should be 1 or more, not {arguments.processes}")
+        return 1
+    if arguments.output_directory is not None and not os.path.isdir(arguments.output_directory):
+        reporter.report_error(f"The output directory {arguments.output_directory} doesn't appear to exist.")
+        return 1
+    maxquant_file_paths = find_maxquant_files(arguments.maxquant_files)
+    if len(maxquant_file_paths) == 0:
+        reporter.report_error(f"No maxquant files were found for {' '.join(arguments.maxquant_files)}")
+        return 1
+
+    settings_dict, is_json_loaded = load_json(reporter, arguments.settings)
+    if is_json_loaded == False:
+        return 1
+    processes = min(arguments.processes, len(maxquant_file_paths))
+    common_directory = get_common_directory(maxquant_file_paths)
+    batch_settings_dicts = {maxquant_file_path: get_batch_settings(settings_dict, maxquant_file_path, arguments.output_directory, processes, common_directory)
+                            for maxquant_file_path in maxquant_file_paths}
+    #the excel file name is validated as it is used in the batch
+    if validate_user_parameters(reporter, batch_settings_dicts[maxquant_file_paths[0]], None) == False:
+        return 1
+    excel_file_name_collisions = find_excel_file_name_collisions(batch_settings_dicts)
+    if len(excel_file_name_collisions) > 0:
+        reporter.report_error("Several maxquant files would be written to the same excel file, no maxquant file has been processed:\n" +
+                              "\n".join(f"{excel_file_name}: {', '.join(colliding_paths)}" for excel_file_name, colliding_paths in excel_file_name_collisions))
+        return 1
+    if prepare_mitocarta_reference(reporter, settings_dict, arguments.refresh_mitocarta) == False:
+        return 1
+
+    reporter.report_status(f"Processing {len(maxquant_file_paths)} maxquant files with {processes} processes")
+    failed_maxquant_file_paths = []
+    if processes == 1:
+        for maxquant_file_path in maxquant_file_paths:
+            if process_maxquant_file_in_worker(maxquant_file_path, batch_settings_dicts[maxquant_file_path], arguments.log_file) == False:
+                failed_maxquant_file_paths.append(maxquant_file_path)
+    else:
+        interrupted_maxquant_file_paths = process_maxquant_files_in_pool(reporter, maxquant_file_paths, batch_settings_dicts, processes, arguments.log_file,
+                                                                         failed_maxquant_file_paths)
+        #a killed worker process (e.g. out of memory) breaks the whole pool, the interrupted maxquant files are therefore processed again
+        #one at a time, so only the maxquant file which kills its process fails
+        for maxquant_file_path in interrupted_maxquant_file_paths:
+            reporter.report_status(f"Processing {maxquant_file_path} again in a new process")
+            if len(process_maxquant_files_in_pool(reporter, [maxquant_file_path], batch_settings_dicts, 1, arguments.log_file, failed_maxquant_file_paths)) > 0:
+                reporter.report_error(f"The process of {maxquant_file_path} stopped unexpectedly, for example because it ran out of memory")
+                failed_maxquant_file_paths.append(maxquant_file_path)
+
+    if len(failed_maxquant_file_paths) > 0:
+        reporter.report_error(f"{len(failed_maxquant_file_paths)} of the {len(maxquant_file_paths)} maxquant files could not be processed:\n" +
+                              "\n".join(failed_maxquant_file_paths))
+        return 1
+    reporter.report_status(f"Finished processing {len(maxquant_file_paths)} maxquant files")
+    return 0
+
+
+if __name__ == "__main__":
+    #needed for the worker processes when the program runs as executable
+    multiprocessing.freeze_support()
+    sys.exit(main(sys.argv[1:]))